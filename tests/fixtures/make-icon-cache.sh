@@ -0,0 +1,16 @@
+#!/bin/sh
+# Regenerate hicolor/icon-theme.cache, the reference cache test_icon_cache.py
+# compares Webby's writer against, then run that comparison. Needs GTK's
+# gtk-update-icon-cache (package libgtk-3-bin, gtk-update-icon-cache or gtk3).
+set -e
+cd "$(dirname "$0")"
+if ! command -v gtk-update-icon-cache >/dev/null 2>&1; then
+    echo "gtk-update-icon-cache not found; install GTK's icon cache tool first" >&2
+    exit 1
+fi
+rm -f hicolor/icon-theme.cache
+gtk-update-icon-cache --force --ignore-theme-index hicolor
+(cd .. && python3 -m unittest -v test_icon_cache.IconCacheTest.test_matches_gtk_update_icon_cache) || {
+    echo "Webby's writer disagrees with gtk-update-icon-cache; see above" >&2
+    exit 1
+}
@@ -0,0 +1,117 @@
+"""Webby's icon-theme.cache writer against the format gtk-update-icon-cache writes."""
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import webby
+
+FIXTURE_THEME = Path(__file__).parent / 'fixtures' / 'hicolor'
+
+
+def by_directory(cache):
+    """{icon name: {directory name: flags}}, independent of directory and bucket order."""
+    directories, icons = cache
+    return {name: {directories[index]: flags for index, flags in images.items()}
+            for name, images in icons.items()}
+
+
+class IconCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.theme = self.tmp / 'hicolor'
+        shutil.copytree(FIXTURE_THEME, self.theme, ignore=shutil.ignore_patterns(webby.ICON_CACHE_NAME))
+
+    def gtk_cache(self):
+        """The reference cache: the checked-in one, else one made by gtk-update-icon-cache now."""
+        reference = FIXTURE_THEME / webby.ICON_CACHE_NAME
+        if reference.exists():
+            return webby.read_icon_theme_cache(reference)
+        if not shutil.which('gtk-update-icon-cache'):
+            self.skipTest("no reference cache (run tests/fixtures/make-icon-cache.sh) and no gtk-update-icon-cache")
+        theme = self.tmp / 'gtk'
+        shutil.copytree(FIXTURE_THEME, theme, ignore=shutil.ignore_patterns(webby.ICON_CACHE_NAME))
+        subprocess.run(['gtk-update-icon-cache', '--force', '--ignore-theme-index', str(theme)], check=True, capture_output=True)
+        return webby.read_icon_theme_cache(theme / webby.ICON_CACHE_NAME)
+
+    def test_matches_gtk_update_icon_cache(self):
+        webby.write_icon_theme_cache(self.theme)
+        written = webby.read_icon_theme_cache(self.theme / webby.ICON_CACHE_NAME)
+        self.assertEqual(by_directory(written), by_directory(self.gtk_cache()))
+
+    def test_fixture_contents(self):
+        webby.write_icon_theme_cache(self.theme)
+        written = webby.read_icon_theme_cache(self.theme / webby.ICON_CACHE_NAME)
+        png, svg = webby.ICON_CACHE_FLAGS['.png'], webby.ICON_CACHE_FLAGS['.svg']
+        self.assertEqual(by_directory(written), {
+            'café': {'16x16/apps': png},
+            'text-html': {'32x32/mimetypes': png},
+            'web-browser': {'48x48/apps': png | svg, 'scalable/apps': svg},
+            'webby-mail': {'16x16/apps': png, '48x48/apps': png, 'scalable/apps': svg},
+        })
+
+    def test_patched_cache_matches_rescan(self):
+        webby.write_icon_theme_cache(self.theme)
+        (self.theme / '16x16' / 'apps' / 'webby-mail.png').unlink()
+        (self.theme / '64x64' / 'apps').mkdir(parents=True)
+        shutil.copy(self.theme / '48x48' / 'apps' / 'webby-mail.png', self.theme / '64x64' / 'apps' / 'webby-news.png')
+        shutil.copy(self.theme / '48x48' / 'apps' / 'webby-mail.png', self.theme / '48x48' / 'apps' / 'webby-news.png')
+
+        webby.write_icon_theme_cache(self.theme, ['webby-mail', 'webby-news'])
+        patched = webby.read_icon_theme_cache(self.theme / webby.ICON_CACHE_NAME)
+        self.assertEqual(by_directory(patched), by_directory(webby.scan_icon_theme(self.theme)))
+
+    def test_patch_rescans_new_directories(self):
+        webby.write_icon_theme_cache(self.theme)
+        (self.theme / '22x22' / 'apps').mkdir(parents=True)
+        shutil.copy(self.theme / '48x48' / 'apps' / 'webby-mail.png', self.theme / '22x22' / 'apps' / 'steam.png')
+        shutil.copy(self.theme / '48x48' / 'apps' / 'webby-mail.png', self.theme / '48x48' / 'apps' / 'webby-news.png')
+
+        webby.write_icon_theme_cache(self.theme, ['webby-news'])
+        patched = by_directory(webby.read_icon_theme_cache(self.theme / webby.ICON_CACHE_NAME))
+        self.assertEqual(patched['steam'], {'22x22/apps': webby.ICON_CACHE_FLAGS['.png']})
+        self.assertIn('webby-news', patched)
+
+    def test_patch_rescans_stale_cache(self):
+        webby.write_icon_theme_cache(self.theme)
+        shutil.copy(self.theme / '48x48' / 'apps' / 'webby-mail.png', self.theme / '48x48' / 'apps' / 'steam.png')
+        # Someone changed the theme after the cache was written, so GTK stops trusting it
+        cache_mtime = (self.theme / webby.ICON_CACHE_NAME).stat().st_mtime_ns
+        os.utime(self.theme, ns=(cache_mtime, cache_mtime + 10 ** 9))
+
+        webby.write_icon_theme_cache(self.theme, ['webby-mail'])
+        patched = by_directory(webby.read_icon_theme_cache(self.theme / webby.ICON_CACHE_NAME))
+        self.assertIn('steam', patched)
+
+    def test_lookup_follows_gtk_hash(self):
+        # GTK finds an icon by walking the chain in bucket hash(name) % n_buckets only
+        data = webby.build_icon_theme_cache(*webby.scan_icon_theme(self.theme))
+        _, _, hash_offset, _ = struct.unpack_from('>HHII', data, 0)
+        n_buckets, = struct.unpack_from('>I', data, hash_offset)
+        for name in ['café', 'web-browser', 'webby-mail', 'text-html']:
+            offset, = struct.unpack_from('>I', data, hash_offset + 4 + 4 * (webby.icon_name_hash(name) % n_buckets))
+            names = []
+            while offset != webby.ICON_CACHE_NONE:
+                offset, name_offset, _ = struct.unpack_from('>III', data, offset)
+                names.append(os.fsdecode(data[name_offset:data.index(b'\0', name_offset)]))
+            self.assertIn(name, names)
+
+    def test_rejects_looping_chain(self):
+        data = bytearray(webby.build_icon_theme_cache(*webby.scan_icon_theme(self.theme)))
+        _, _, hash_offset, _ = struct.unpack_from('>HHII', data, 0)
+        n_buckets, = struct.unpack_from('>I', data, hash_offset)
+        buckets = struct.unpack_from(f'>{n_buckets}I', data, hash_offset + 4)
+        first = next(offset for offset in buckets if offset != webby.ICON_CACHE_NONE)
+        struct.pack_into('>I', data, first, first)
+        with self.assertRaises(ValueError):
+            webby.parse_icon_theme_cache(bytes(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,10 +5,31 @@ import sys
 import shutil
 import subprocess
 import urllib.request
+import urllib.parse
+import http.client
 import hashlib
+import base64
 import argparse
 import platform
 import tempfile
+import threading
+import random
+import time
+import gzip
+import zlib
+import json
+import io
+import tarfile
+import contextlib
+import struct
+import re
+import shlex
+import configparser
+import difflib
+import plistlib
+import select
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from pathlib import Path
 
 # Platform detection
@@ -177,6 +198,16 @@ BROWSERS_WINDOWS = [
 
 ICON_SIZES = [512, 256, 128, 96, 64, 48, 32, 24, 16]
 
+USER_AGENT = f'Mozilla/5.0 ({get_platform_name()}) Webby/1.1'
+
+# HTTP client settings
+HTTP_TIMEOUT = 15
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.5
+HTTP_MAX_PER_HOST = 4
+HTTP_MAX_IDLE_PER_HOST = 2
+HTTP_MAX_REDIRECTS = 5
+
 def expand_windows_path(path):
     """Expand Windows environment variables in path."""
     if not IS_WINDOWS:
@@ -203,117 +234,431 @@ def styled_input(prompt, color=Colors.CYAN):
     print(f"{Colors.GRAY}└{'─' * 46}┘{Colors.RESET}")
     return input(f"  {Colors.WHITE}▸ {Colors.RESET}").strip()
 
+# Output is suppressed while the library API is running (see quiet_output())
+_quiet_depth = 0
+
+@contextlib.contextmanager
+def quiet_output():
+    """Silence progress and status messages, e.g. when used as a library."""
+    global _quiet_depth
+    _quiet_depth += 1
+    try:
+        yield
+    finally:
+        _quiet_depth -= 1
+
+def print_status(message, end='\n'):
+    if _quiet_depth:
+        return
+    print(message, end=end, flush=True)
+
 def print_success(message):
-    print(f"\n  {Colors.GREEN}✓{Colors.RESET} {message}")
+    print_status(f"\n  {Colors.GREEN}✓{Colors.RESET} {message}")
 
 def print_error(message):
-    print(f"\n  {Colors.RED}✗{Colors.RESET} {message}")
+    print_status(f"\n  {Colors.RED}✗{Colors.RESET} {message}")
 
 def print_info(message):
-    print(f"\n  {Colors.BLUE}ℹ{Colors.RESET} {message}")
+    print_status(f"\n  {Colors.BLUE}ℹ{Colors.RESET} {message}")
+
+# System-wide target prefix (Linux), or None when installing for the current user
+SYSTEM_PREFIX = None
+DEFAULT_SYSTEM_PREFIX = '/usr'
+
+def set_system_target(prefix=DEFAULT_SYSTEM_PREFIX):
+    """Install into system-wide locations shared by every account."""
+    global SYSTEM_PREFIX
+    SYSTEM_PREFIX = Path(prefix or DEFAULT_SYSTEM_PREFIX)
+
+def is_system_target():
+    return SYSTEM_PREFIX is not None
+
+# Directories already created by this process, so path helpers only mkdir once
+_created_dirs = set()
+
+def ensure_dir(path):
+    """Create a directory (and parents) once per process."""
+    if path not in _created_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(path)
+    return path
 
 def get_applications_dir():
     """Get the applications directory for the current platform."""
     if IS_WINDOWS:
-        # Windows Start Menu programs folder
-        start_menu = Path(os.environ.get('APPDATA', '')) / 'Microsoft' / 'Windows' / 'Start Menu' / 'Programs' / 'Webby'
-        start_menu.mkdir(parents=True, exist_ok=True)
-        return start_menu
+        # Windows Start Menu programs folder (all users with --system)
+        root = os.environ.get('PROGRAMDATA', r'C:\ProgramData') if is_system_target() else os.environ.get('APPDATA', '')
+        start_menu = Path(root) / 'Microsoft' / 'Windows' / 'Start Menu' / 'Programs' / 'Webby'
+        return ensure_dir(start_menu)
     elif IS_MACOS:
-        # macOS Applications folder (user-specific)
-        apps_dir = Path.home() / 'Applications' / 'Webby Apps'
-        apps_dir.mkdir(parents=True, exist_ok=True)
-        return apps_dir
+        # macOS Applications folder (user-specific unless --system)
+        root = Path('/') if is_system_target() else Path.home()
+        apps_dir = root / 'Applications' / 'Webby Apps'
+        return ensure_dir(apps_dir)
+    elif is_system_target():
+        # Linux <prefix>/share/applications
+        return SYSTEM_PREFIX / 'share' / 'applications'
     else:
         # Linux ~/.local/share/applications
         return Path.home() / '.local' / 'share' / 'applications'
 
+def get_data_dir():
+    """Get Webby's own data directory (icons, icon store, registry)."""
+    if IS_WINDOWS:
+        root = os.environ.get('PROGRAMDATA', r'C:\ProgramData') if is_system_target() else os.environ.get('LOCALAPPDATA', '')
+        return Path(root) / 'Webby'
+    elif IS_MACOS:
+        root = Path('/') if is_system_target() else Path.home()
+        return root / 'Library' / 'Application Support' / 'Webby'
+    elif is_system_target():
+        return SYSTEM_PREFIX / 'share' / 'webby'
+    else:
+        return Path.home() / '.local' / 'share' / 'webby'
+
+# File locking
+#
+# Concurrent webby processes coordinate through lock files: one per app name,
+# taken around anything that writes that app's launcher or icons, and one shared
+# refresh lock serializing writes to the icon theme and desktop database with
+# the cache rebuilds that read them. Locks are reentrant within a thread; app
+# locks must be taken before the refresh lock.
+
+_held_locks = threading.local()
+
+def get_lock_dir():
+    return ensure_dir(get_data_dir() / 'locks')
+
+def _lock_fd(fd):
+    if IS_WINDOWS:
+        import msvcrt
+        while True:
+            try:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after ~10 seconds; keep waiting like flock does
+                continue
+    import fcntl
+    fcntl.flock(fd, fcntl.LOCK_EX)
+
+def _unlock_fd(fd):
+    if IS_WINDOWS:
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on path (created if missing) across processes and threads."""
+    key = str(path)
+    held = getattr(_held_locks, 'paths', None)
+    if held is None:
+        held = _held_locks.paths = {}
+    if key in held:
+        held[key][1] += 1
+        try:
+            yield
+        finally:
+            held[key][1] -= 1
+        return
+    
+    ensure_dir(Path(path).parent)
+    fd = os.open(key, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        _lock_fd(fd)
+        held[key] = [fd, 1]
+        try:
+            yield
+        finally:
+            del held[key]
+            _unlock_fd(fd)
+    finally:
+        os.close(fd)
+
+@contextlib.contextmanager
+def app_lock(*names):
+    """Lock one or more apps by name (case-insensitive), in a fixed order."""
+    keys = sorted({sanitize_name(name) or hashlib.sha256(name.lower().encode()).hexdigest()[:16] for name in names})
+    with contextlib.ExitStack() as stack:
+        for key in keys:
+            stack.enter_context(file_lock(get_lock_dir() / f'app-{key}.lock'))
+        yield
+
+def refresh_lock():
+    """Lock the shared icon theme and desktop database against concurrent rebuilds."""
+    return file_lock(get_lock_dir() / 'refresh.lock')
+
+# Filesystem types where every stat/read is a network round trip
+REMOTE_FS_TYPES = {
+    'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'afs', '9p', 'ceph', 'glusterfs',
+    'lustre', 'davfs', 'fuse.sshfs', 'fuse.rclone', 'fuse.glusterfs', 'fuse.cephfs',
+}
+SCAN_WORKERS = 8
+DESKTOP_READ_CHUNK = 4096
+
+_remote_fs_cache = {}
+
+def is_remote_filesystem(path):
+    """Check whether path lives on a network filesystem (Linux only)."""
+    if not IS_LINUX:
+        return False
+    path = os.path.realpath(str(path))
+    if path in _remote_fs_cache:
+        return _remote_fs_cache[path]
+    
+    best_mount, best_type = '', ''
+    try:
+        with open('/proc/self/mounts') as mounts:
+            for line in mounts:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point = fields[1].replace('\\040', ' ')
+                if (path == mount_point or path.startswith(mount_point.rstrip('/') + '/')) and len(mount_point) >= len(best_mount):
+                    best_mount, best_type = mount_point, fields[2]
+    except OSError:
+        pass
+    
+    remote = best_type in REMOTE_FS_TYPES
+    _remote_fs_cache[path] = remote
+    return remote
+
+def read_desktop_entry(path):
+    """Read the [Desktop Entry] group of a .desktop file as a dict.
+    
+    Only reads as far as the end of that group instead of the whole file.
+    """
+    entry = {}
+    in_group = False
+    pending = ''
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        while True:
+            chunk = f.read(DESKTOP_READ_CHUNK)
+            lines = (pending + chunk).split('\n')
+            pending = lines.pop() if chunk else ''
+            for line in lines:
+                line = line.strip()
+                if line.startswith('['):
+                    if in_group:
+                        return entry
+                    in_group = line == '[Desktop Entry]'
+                elif in_group and '=' in line and not line.startswith('#'):
+                    key, value = line.split('=', 1)
+                    entry.setdefault(key.strip(), value.strip())
+            if not chunk:
+                return entry
+
+def unwrap_exec(exec_line):
+    """Undo the sh -c wrapper used for system-wide GNOME Web apps."""
+    prefix = 'sh -c "'
+    if not exec_line.startswith(prefix):
+        return exec_line
+    inner = exec_line[len(prefix):].rstrip()
+    if inner.endswith('"'):
+        inner = inner[:-1]
+    inner = re.sub(r'\\(.)', r'\1', inner.replace('\\\\', '\\'))
+    # The script quotes its arguments for sh; give them back in Exec= form
+    try:
+        args = shlex.split(inner)
+    except ValueError:
+        return inner
+    if args[:1] == ['exec']:
+        args = args[1:]
+    return ' '.join(args[:1] + [f'"{arg}"' for arg in args[1:]])
+
+def escape_exec_arg(value):
+    """Escape a value for use inside a double-quoted Exec= argument."""
+    for char in '\\"`$':
+        value = value.replace(char, '\\' + char)
+    return value.replace('\\', '\\\\')
+
+def parse_exec_url(exec_line):
+    """Find the URL an Exec= line launches."""
+    exec_line = unwrap_exec(exec_line)
+    for part in exec_line.split('"')[1::2]:
+        if part.startswith(('http://', 'https://')):
+            return part
+    for part in exec_line.split():
+        if part.startswith(('http://', 'https://')):
+            return part
+    return ''
+
+def _read_windows_app(shortcut_file):
+    name = shortcut_file.stem
+    # For Windows, we store metadata in a companion .webby file
+    meta_file = shortcut_file.with_suffix('.webby')
+    url = ''
+    icon = ''
+    browser = ''
+    if meta_file.exists():
+        for line in meta_file.read_text().split('\n'):
+            if line.startswith('URL='):
+                url = line[4:]
+            elif line.startswith('Icon='):
+                # Generated (--target windows) shortcuts store %LOCALAPPDATA%\... paths
+                icon = os.path.expandvars(line[5:])
+            elif line.startswith('Browser='):
+                browser = line[8:]
+    return {
+        'name': name,
+        'url': url,
+        'icon': icon,
+        'browser': browser,
+        'file': shortcut_file
+    }
+
+def _read_macos_app(app_bundle):
+    name = app_bundle.stem
+    url = ''
+    icon = ''
+    browser = ''
+    # Read URL from the shell script
+    script_file = app_bundle / 'Contents' / 'MacOS' / name
+    if script_file.exists():
+        content = script_file.read_text()
+        for line in content.split('\n'):
+            if line.startswith('exec "'):
+                browser = line.split('"')[1]
+            if 'http' in line:
+                url = parse_exec_url(line)
+                if url:
+                    break
+    return {
+        'name': name,
+        'url': url,
+        'icon': icon,
+        'browser': browser,
+        'file': app_bundle
+    }
+
+def _read_linux_app(desktop_file):
+    entry = read_desktop_entry(desktop_file)
+    name = entry.get('Name')
+    if not name:
+        return None
+    exec_line = unwrap_exec(entry.get('Exec', ''))
+    return {
+        'name': name,
+        'url': parse_exec_url(exec_line),
+        'icon': entry.get('Icon', ''),
+        'browser': exec_line.split()[0] if exec_line.split() else '',
+        'file': desktop_file
+    }
+
+def _is_app_entry(entry):
+    """Check a directory entry using only the cached d_type information."""
+    name = entry.name
+    if IS_WINDOWS:
+        return name.lower().endswith('.lnk') and entry.is_file()
+    elif IS_MACOS:
+        return name.endswith('.app') and entry.is_dir()
+    return name.startswith('webby-') and name.endswith('.desktop') and entry.is_file()
+
+def _read_app(path):
+    try:
+        if IS_WINDOWS:
+            return _read_windows_app(path)
+        elif IS_MACOS:
+            return _read_macos_app(path)
+        return _read_linux_app(path)
+    except Exception:
+        return None
+
+class _Session:
+    """In-memory app and browser state shared by a series of operations."""
+    def __init__(self):
+        self.apps = None
+        self.browsers = None
+
+_session = None
+
+@contextlib.contextmanager
+def app_session():
+    """Scan apps and browsers once and keep them in memory until the block exits.
+    
+    Apps created or deleted inside the block update the in-memory state directly.
+    """
+    global _session
+    outer = _session
+    if outer is None:
+        _session = _Session()
+    try:
+        yield
+    finally:
+        if outer is None:
+            _session = None
+
+def _remember_app(app_file):
+    if _session is not None and _session.apps is not None:
+        app = _read_app(app_file)
+        if app:
+            _session.apps[app['name'].lower()] = app
+
+def _forget_app(app):
+    if _session is not None and _session.apps is not None:
+        _session.apps.pop(app['name'].lower(), None)
+
+def get_app_file(name):
+    """Path of the launcher an app with this name is stored in."""
+    apps_dir = get_applications_dir()
+    if IS_WINDOWS:
+        return apps_dir / f'{name}.lnk'
+    elif IS_MACOS:
+        return apps_dir / f'{name}.app'
+    return apps_dir / f'webby-{sanitize_name(name)}.desktop'
+
+def reload_app(name):
+    """Re-read one app from disk, bypassing (and refreshing) the session cache.
+    
+    Call with the app's lock held, so the record can't change before it is used.
+    """
+    cached = _session.apps.get(name.lower()) if _session is not None and _session.apps else None
+    paths = [get_app_file(name)]
+    if cached and cached['file'] != paths[0]:
+        paths.append(cached['file'])
+    for path in paths:
+        app = _read_app(path) if path.exists() else None
+        if app and app['name'].lower() == name.lower():
+            _remember_app(path)
+            return app
+    if cached:
+        _forget_app(cached)
+    return None
+
 def get_webby_apps():
     """Get all Webby-created apps for the current platform."""
+    if _session is None:
+        return scan_webby_apps()
+    if _session.apps is None:
+        _session.apps = scan_webby_apps()
+    return _session.apps
+
+def scan_webby_apps():
+    """Read all Webby-created apps from disk."""
     apps = {}
+    apps_dir = get_applications_dir()
     
-    if IS_WINDOWS:
-        apps_dir = get_applications_dir()
-        for shortcut_file in apps_dir.glob('*.lnk'):
-            try:
-                name = shortcut_file.stem
-                # For Windows, we store metadata in a companion .webby file
-                meta_file = shortcut_file.with_suffix('.webby')
-                url = ''
-                icon = ''
-                if meta_file.exists():
-                    for line in meta_file.read_text().split('\n'):
-                        if line.startswith('URL='):
-                            url = line[4:]
-                        elif line.startswith('Icon='):
-                            icon = line[5:]
-                apps[name.lower()] = {
-                    'name': name,
-                    'url': url,
-                    'icon': icon,
-                    'file': shortcut_file
-                }
-            except Exception:
-                pass
-    elif IS_MACOS:
-        apps_dir = get_applications_dir()
-        for app_bundle in apps_dir.glob('*.app'):
-            try:
-                name = app_bundle.stem
-                plist_file = app_bundle / 'Contents' / 'Info.plist'
-                url = ''
-                icon = ''
-                # Read URL from the shell script
-                script_file = app_bundle / 'Contents' / 'MacOS' / name
-                if script_file.exists():
-                    content = script_file.read_text()
-                    for line in content.split('\n'):
-                        if 'http' in line:
-                            import re
-                            urls = re.findall(r'https?://[^\s"\']+', line)
-                            if urls:
-                                url = urls[0]
-                                break
-                apps[name.lower()] = {
-                    'name': name,
-                    'url': url,
-                    'icon': icon,
-                    'file': app_bundle
-                }
-            except Exception:
-                pass
+    try:
+        with os.scandir(apps_dir) as entries:
+            paths = [apps_dir / entry.name for entry in entries if _is_app_entry(entry)]
+    except FileNotFoundError:
+        return apps
+    
+    # On network filesystems each read is a round trip, so overlap them
+    if len(paths) > 1 and is_remote_filesystem(apps_dir):
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+            records = list(executor.map(_read_app, paths))
     else:
-        # Linux
-        apps_dir = get_applications_dir()
-        for desktop_file in apps_dir.glob('webby-*.desktop'):
-            try:
-                content = desktop_file.read_text()
-                name = None
-                url = None
-                icon = None
-                for line in content.split('\n'):
-                    if line.startswith('Name='):
-                        name = line[5:]
-                    elif line.startswith('Exec='):
-                        exec_line = line[5:]
-                        if '"http' in exec_line:
-                            url = exec_line.split('"')[1]
-                        elif 'http' in exec_line:
-                            for part in exec_line.split():
-                                if part.startswith('http'):
-                                    url = part
-                                    break
-                    elif line.startswith('Icon='):
-                        icon = line[5:]
-                if name:
-                    apps[name.lower()] = {
-                        'name': name,
-                        'url': url or '',
-                        'icon': icon or '',
-                        'file': desktop_file
-                    }
-            except Exception:
-                pass
+        records = [_read_app(path) for path in paths]
+    
+    for app in records:
+        if app:
+            apps[app['name'].lower()] = app
     return apps
 
 def find_app_by_name(search_name):
@@ -331,6 +676,14 @@ def find_app_by_name(search_name):
 
 def detect_all_browsers():
     """Detect all available browsers on the current platform."""
+    if _session is None:
+        return scan_browsers()
+    if _session.browsers is None:
+        _session.browsers = scan_browsers()
+    return list(_session.browsers)
+
+def scan_browsers():
+    """Look up every known browser on disk or in PATH."""
     available = []
     seen_names = set()
     
@@ -380,26 +733,332 @@ def sanitize_name(name):
     return safe.lower().replace(' ', '-')
 
 def get_icons_dir():
-    if IS_WINDOWS:
-        icons_dir = Path(os.environ.get('LOCALAPPDATA', '')) / 'Webby' / 'icons'
-    elif IS_MACOS:
-        icons_dir = Path.home() / 'Library' / 'Application Support' / 'Webby' / 'icons'
-    else:
-        icons_dir = Path.home() / '.local' / 'share' / 'webby' / 'icons'
-    icons_dir.mkdir(parents=True, exist_ok=True)
-    return icons_dir
+    return ensure_dir(get_data_dir() / 'icons')
+
+def get_hicolor_base():
+    """Get the root of the hicolor icon theme Webby installs into (Linux only)."""
+    if is_system_target():
+        return SYSTEM_PREFIX / 'share' / 'icons' / 'hicolor'
+    return Path.home() / '.local' / 'share' / 'icons' / 'hicolor'
 
 def get_hicolor_dir(size):
     """Get hicolor icon directory (Linux only)."""
-    icons_dir = Path.home() / '.local' / 'share' / 'icons' / 'hicolor' / f'{size}x{size}' / 'apps'
-    icons_dir.mkdir(parents=True, exist_ok=True)
-    return icons_dir
+    return ensure_dir(get_hicolor_base() / f'{size}x{size}' / 'apps')
 
 def get_epiphany_profile_dir(app_name):
     """Get GNOME Web profile directory (Linux only)."""
     profile_dir = Path.home() / '.local' / 'share' / 'webby' / 'epiphany-profiles' / sanitize_name(app_name)
-    profile_dir.mkdir(parents=True, exist_ok=True)
-    return profile_dir
+    return ensure_dir(profile_dir)
+
+def get_icon_store_dir():
+    """Get the content-addressed store installed icons are linked to (Linux only)."""
+    return ensure_dir(get_data_dir() / 'icon-store')
+
+# ioctl request for reflinking a whole file (Linux FICLONE)
+FICLONE = 0x40049409
+
+def file_digest(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+def temp_path_for(dest, suffix=None):
+    """Create an empty, uniquely named temp file next to dest (ending in suffix, or dest's)."""
+    suffix = dest.suffix if suffix is None else suffix
+    fd, temp_name = tempfile.mkstemp(prefix=f'.{dest.stem}-', suffix=suffix, dir=str(dest.parent))
+    os.close(fd)
+    # mkstemp creates 0600 files; installed files must stay readable by every account
+    os.chmod(temp_name, 0o644)
+    return Path(temp_name)
+
+def write_file_atomic(dest, data, mode=None, temp_suffix=None):
+    """Write bytes to dest through a temp file and rename, so readers never see partial data."""
+    dest = Path(dest)
+    ensure_dir(dest.parent)
+    temp_path = temp_path_for(dest, temp_suffix)
+    try:
+        temp_path.write_bytes(data)
+        if mode is not None:
+            os.chmod(temp_path, mode)
+        os.replace(temp_path, dest)
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+def clone_file(source, dest, link=True):
+    """Create dest with the contents of source, sharing storage where possible.
+    
+    Tries a hardlink first (unless link is False), then a reflink (copy-on-write
+    clone), then a plain copy.
+    """
+    if link:
+        try:
+            os.link(source, dest)
+            return
+        except OSError:
+            pass
+    if IS_LINUX:
+        try:
+            import fcntl
+            with open(source, 'rb') as src, open(dest, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return
+        except (OSError, ImportError):
+            Path(dest).unlink(missing_ok=True)
+    shutil.copy2(source, dest)
+
+def _release_stored_icon(digest, suffix):
+    """Drop a stored icon once no installed icon links to it anymore."""
+    stored = get_icon_store_dir() / f'{digest}{suffix}'
+    try:
+        if stored.stat().st_nlink <= 1:
+            stored.unlink()
+    except FileNotFoundError:
+        pass
+
+def commit_icon_file(temp_path, dest):
+    """Move a freshly written icon into place, sharing storage with identical icons.
+    
+    Installed icons are hardlinked to a copy in the icon store named after their
+    SHA-256, so apps with byte-identical icons share one file on disk. Icons are
+    always replaced, never written in place, as the inode may be shared.
+    """
+    temp_path = Path(temp_path)
+    dest = Path(dest)
+    suffix = dest.suffix.lower()
+    digest = file_digest(temp_path)
+    stored = get_icon_store_dir() / f'{digest}{suffix}'
+    
+    with refresh_lock():
+        old_digest = None
+        if dest.is_file():
+            try:
+                old_digest = file_digest(dest)
+            except OSError:
+                pass
+        
+        if stored.exists():
+            temp_path.unlink()
+            clone_file(stored, temp_path)
+        else:
+            try:
+                os.link(temp_path, stored)
+            except OSError:
+                pass
+        os.replace(temp_path, dest)
+        # rename() is a no-op when both names already link to the same (stored) inode
+        temp_path.unlink(missing_ok=True)
+        
+        if old_digest and old_digest != digest:
+            _release_stored_icon(old_digest, suffix)
+
+def release_icon_file(icon_file):
+    """Remove an installed icon, dropping its stored copy when it was the last reference."""
+    icon_file = Path(icon_file)
+    with refresh_lock():
+        try:
+            digest = file_digest(icon_file)
+        except OSError:
+            return
+        icon_file.unlink(missing_ok=True)
+        _release_stored_icon(digest, icon_file.suffix.lower())
+
+class IconFrame:
+    def __init__(self, index, width, height, bpp, offset, size, is_png):
+        self.index = index
+        self.width = width
+        self.height = height
+        self.bpp = bpp
+        self.offset = offset
+        self.size = size
+        self.is_png = is_png
+
+class ImageInfo:
+    def __init__(self, format, width, height, frames=None):
+        self.format = format
+        self.width = width
+        self.height = height
+        self.frames = frames or []
+
+    @property
+    def best_frame(self):
+        """The sharpest embedded frame (largest, then deepest colour) of a multi-image file."""
+        if not self.frames:
+            return None
+        return max(self.frames, key=lambda f: (f.width * f.height, f.bpp, f.is_png))
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def _probe_png(header):
+    if len(header) >= 24 and header[12:16] == b'IHDR':
+        width, height = struct.unpack('>II', header[16:24])
+        return ImageInfo('png', width, height)
+    return None
+
+def _probe_jpeg(f):
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff':
+            byte = f.read(1)
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if marker in JPEG_SOF_MARKERS:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack('>HH', data[1:5])
+            return ImageInfo('jpeg', width, height)
+        f.seek(length - 2, os.SEEK_CUR)
+
+def _probe_webp(f, header):
+    chunk = header[12:16]
+    f.seek(20)
+    data = f.read(10)
+    if chunk == b'VP8 ' and len(data) >= 10 and data[3:6] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', data[6:10])
+        return ImageInfo('webp', width & 0x3FFF, height & 0x3FFF)
+    if chunk == b'VP8L' and len(data) >= 5 and data[0] == 0x2F:
+        bits = struct.unpack('<I', data[1:5])[0]
+        return ImageInfo('webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+    if chunk == b'VP8X' and len(data) >= 10:
+        width = int.from_bytes(data[4:7], 'little') + 1
+        height = int.from_bytes(data[7:10], 'little') + 1
+        return ImageInfo('webp', width, height)
+    return None
+
+def _probe_ico(f, header):
+    count = struct.unpack('<H', header[4:6])[0]
+    if count == 0:
+        return None
+    f.seek(6)
+    directory = f.read(16 * count)
+    frames = []
+    for index in range(len(directory) // 16):
+        entry = directory[index * 16:(index + 1) * 16]
+        width, height = entry[0] or 256, entry[1] or 256
+        bpp, size, offset = struct.unpack('<HII', entry[6:16])
+        f.seek(offset)
+        frame_header = f.read(24)
+        is_png = frame_header.startswith(PNG_SIGNATURE)
+        if is_png:
+            png = _probe_png(frame_header)
+            if png:
+                width, height = png.width, png.height
+        frames.append(IconFrame(index, width, height, bpp, offset, size, is_png))
+    if not frames:
+        return None
+    info = ImageInfo('ico', 0, 0, frames)
+    info.width, info.height = info.best_frame.width, info.best_frame.height
+    return info
+
+def probe_image(path):
+    """Read image dimensions from file headers only (PNG, JPEG, GIF, ICO, WebP).
+    
+    Returns an ImageInfo, or None if the format is unknown or the file is unreadable.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return probe_image_stream(f)
+    except OSError:
+        return None
+
+def probe_image_stream(f):
+    """Probe an open binary file object (see probe_image)."""
+    try:
+        header = f.read(32)
+        if header.startswith(PNG_SIGNATURE):
+            return _probe_png(header)
+        if header[:6] in (b'GIF87a', b'GIF89a') and len(header) >= 10:
+            width, height = struct.unpack('<HH', header[6:10])
+            return ImageInfo('gif', width, height)
+        if header.startswith(b'\xff\xd8'):
+            return _probe_jpeg(f)
+        if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+            return _probe_webp(f, header)
+        if header[:4] in (b'\x00\x00\x01\x00', b'\x00\x00\x02\x00') and len(header) >= 6:
+            return _probe_ico(f, header)
+    except (OSError, struct.error):
+        pass
+    return None
+
+def extract_ico_frame(source, frame, dest):
+    """Write a PNG-compressed .ico frame out as a standalone PNG file."""
+    with open(source, 'rb') as f:
+        f.seek(frame.offset)
+        Path(dest).write_bytes(f.read(frame.size))
+
+def select_icon_sizes(info):
+    """Pick the theme sizes worth rendering for a source image, skipping upscales."""
+    if info is None or not info.width or not info.height:
+        return list(ICON_SIZES)
+    source_size = max(info.width, info.height)
+    sizes = [size for size in ICON_SIZES if size <= source_size]
+    return sizes or [min(ICON_SIZES)]
+
+# Rendered icon sizes are cached by source content, size and render arguments,
+# so re-installing an unchanged icon skips ImageMagick entirely.
+RENDER_CACHE_VERSION = 1
+RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+def get_render_cache_dir():
+    return ensure_dir(get_cache_dir() / 'renders')
+
+def render_cache_key(source_digest, params):
+    key = json.dumps([RENDER_CACHE_VERSION, source_digest, params])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def get_cached_render(key):
+    """Return the cached render for key, marking it recently used, or None."""
+    path = get_render_cache_dir() / f'{key}.png'
+    try:
+        os.utime(path)
+    except OSError:
+        return None
+    return path
+
+def store_render(key, rendered):
+    """Copy a fresh render into the cache.
+    
+    Renders are copied rather than hardlinked: a link would count as a reference
+    to the icon store's copy and keep it alive after the icon is removed.
+    """
+    dest = get_render_cache_dir() / f'{key}.png'
+    temp_path = temp_path_for(dest)
+    try:
+        temp_path.unlink()
+        clone_file(rendered, temp_path, link=False)
+        os.replace(temp_path, dest)
+    except OSError:
+        temp_path.unlink(missing_ok=True)
+
+def prune_render_cache(max_bytes=RENDER_CACHE_MAX_BYTES):
+    """Evict least recently used renders until the cache fits in max_bytes."""
+    entries = []
+    total = 0
+    for entry in os.scandir(get_render_cache_dir()):
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime_ns, st.st_size, entry.path))
+        total += st.st_size
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+            total -= size
+        except OSError:
+            pass
 
 def install_icon_to_theme(source_path, icon_name):
     """Install icon to appropriate location for the platform."""
@@ -433,53 +1092,112 @@ def install_icon_to_theme(source_path, icon_name):
     
     # Linux: install to hicolor theme
     if ext == '.svg':
-        scalable_dir = Path.home() / '.local' / 'share' / 'icons' / 'hicolor' / 'scalable' / 'apps'
-        scalable_dir.mkdir(parents=True, exist_ok=True)
+        scalable_dir = ensure_dir(get_hicolor_base() / 'scalable' / 'apps')
         dest = scalable_dir / f'webby-{icon_name}.svg'
-        shutil.copy2(source, dest)
-        update_icon_cache()
+        temp_path = temp_path_for(dest)
+        shutil.copy2(source, temp_path)
+        commit_icon_file(temp_path, dest)
+        release_stale_theme_icons(f'webby-{icon_name}', {dest})
+        update_icon_cache([f'webby-{icon_name}'])
         return f'webby-{icon_name}'
     
     has_magick = shutil.which('magick') or shutil.which('convert')
     
+    # Probe the source so only sensible sizes are rendered, and pick the sharpest .ico frame
+    info = probe_image(source)
+    render_file = source
+    frame_suffix = ''
+    extracted = None
+    if info and info.format == 'ico':
+        frame = info.best_frame
+        if frame.is_png:
+            extracted = temp_path_for(icons_dir / f'{icon_name}-frame.png')
+            extract_ico_frame(source, frame, extracted)
+            render_file = extracted
+            info = probe_image(extracted) or info
+        elif has_magick:
+            frame_suffix = f'[{frame.index}]'
+    render_source = f'{render_file}{frame_suffix}'
+    sizes = select_icon_sizes(info)
+    
+    render_start = time.monotonic()
     if has_magick:
         convert_cmd = 'magick' if shutil.which('magick') else 'convert'
-        for size in ICON_SIZES:
+        source_digest = file_digest(render_file)
+        stored_renders = False
+        written = set()
+        for size in sizes:
             size_dir = get_hicolor_dir(size)
             dest = size_dir / f'webby-{icon_name}.png'
+            temp_path = temp_path_for(dest)
+            render_args = ['-resize', f'{size}x{size}', '-background', 'none', '-gravity', 'center', '-extent', f'{size}x{size}']
+            key = render_cache_key(source_digest, [frame_suffix, *render_args])
             try:
-                subprocess.run(
-                    [convert_cmd, str(source), '-resize', f'{size}x{size}', '-background', 'none', '-gravity', 'center', '-extent', f'{size}x{size}', str(dest)],
-                    capture_output=True,
-                    check=True
-                )
+                cached = get_cached_render(key)
+                if cached:
+                    METRICS.inc('webby_render_cache_total', result='hit')
+                    temp_path.unlink()
+                    clone_file(cached, temp_path, link=False)
+                else:
+                    METRICS.inc('webby_render_cache_total', result='miss')
+                    subprocess.run(
+                        [convert_cmd, render_source, *render_args, str(temp_path)],
+                        capture_output=True,
+                        check=True
+                    )
+                    store_render(key, temp_path)
+                    stored_renders = True
+                commit_icon_file(temp_path, dest)
+                written.add(dest)
             except Exception:
-                pass
+                temp_path.unlink(missing_ok=True)
+        if stored_renders:
+            prune_render_cache()
     else:
-        for size in [256, 128, 64, 48]:
+        # Without ImageMagick the file is copied as-is into the sizes it can fill
+        fallback_sizes = [size for size in [256, 128, 64, 48] if size in sizes] or [max(sizes)]
+        written = set()
+        for size in fallback_sizes:
             size_dir = get_hicolor_dir(size)
             dest = size_dir / f'webby-{icon_name}.png'
-            shutil.copy2(source, dest)
+            temp_path = temp_path_for(dest)
+            shutil.copy2(render_source, temp_path)
+            commit_icon_file(temp_path, dest)
+            written.add(dest)
     
-    update_icon_cache()
+    # Sizes the previous icon filled but this one doesn't would keep showing the old image
+    if written:
+        release_stale_theme_icons(f'webby-{icon_name}', written)
+    
+    METRICS.observe('webby_icon_rasterize_duration_seconds', time.monotonic() - render_start)
+    
+    if extracted:
+        extracted.unlink(missing_ok=True)
+    
+    update_icon_cache([f'webby-{icon_name}'])
     return f'webby-{icon_name}'
 
+def get_theme_icon_files(icon_name):
+    """Every hicolor file an installed icon can occupy (all sizes plus scalable)."""
+    hicolor_base = get_hicolor_base()
+    icon_files = [hicolor_base / f'{size}x{size}' / 'apps' / f'{icon_name}.png' for size in ICON_SIZES]
+    icon_files.append(hicolor_base / 'scalable' / 'apps' / f'{icon_name}.svg')
+    return icon_files
+
+def release_stale_theme_icons(icon_name, keep):
+    """Remove an icon's theme files except the ones in keep."""
+    for icon_file in get_theme_icon_files(icon_name):
+        if icon_file not in keep:
+            release_icon_file(icon_file)
+
 def remove_icon_from_theme(icon_name):
     """Remove icon from theme (mainly for Linux)."""
     if IS_LINUX:
         if not icon_name.startswith('webby-'):
             return
         
-        hicolor_base = Path.home() / '.local' / 'share' / 'icons' / 'hicolor'
-        
-        for size in ICON_SIZES:
-            icon_file = hicolor_base / f'{size}x{size}' / 'apps' / f'{icon_name}.png'
-            icon_file.unlink(missing_ok=True)
-        
-        scalable_file = hicolor_base / 'scalable' / 'apps' / f'{icon_name}.svg'
-        scalable_file.unlink(missing_ok=True)
-        
-        update_icon_cache()
+        release_stale_theme_icons(icon_name, set())
+        update_icon_cache([icon_name])
     else:
         # Windows/macOS: remove from icons directory
         icons_dir = get_icons_dir()
@@ -487,9 +1205,426 @@ def remove_icon_from_theme(icon_name):
             icon_file = icons_dir / f'{icon_name}{ext}'
             icon_file.unlink(missing_ok=True)
 
+def rename_app_icon(icon, old_name, new_name):
+    """Move an app's own icon files to the new app name. Returns the new icon reference.
+    
+    Theme icons and icons that don't belong to the app are returned unchanged.
+    """
+    old_safe, new_safe = sanitize_name(old_name), sanitize_name(new_name)
+    if old_safe == new_safe or not icon:
+        return icon
+    
+    if IS_LINUX:
+        if icon != f'webby-{old_safe}':
+            return icon
+        hicolor_base = get_hicolor_base()
+        icon_files = [hicolor_base / f'{size}x{size}' / 'apps' / f'{icon}.png' for size in ICON_SIZES]
+        icon_files.append(hicolor_base / 'scalable' / 'apps' / f'{icon}.svg')
+        with refresh_lock():
+            for icon_file in icon_files:
+                if icon_file.exists():
+                    dest = icon_file.with_name(f'webby-{new_safe}{icon_file.suffix}')
+                    release_icon_file(dest)
+                    os.rename(icon_file, dest)
+        update_icon_cache([icon, f'webby-{new_safe}'])
+        return f'webby-{new_safe}'
+    
+    # Windows/macOS: icons live in the icons directory, named after the app
+    icon_path = Path(icon)
+    if icon_path.parent != get_icons_dir() or icon_path.stem != old_safe:
+        return icon
+    for ext in ['.png', '.ico', '.icns', '.jpg', '.svg']:
+        old_file = icon_path.with_name(f'{old_safe}{ext}')
+        if old_file.exists():
+            os.replace(old_file, icon_path.with_name(f'{new_safe}{ext}'))
+    return str(icon_path.with_name(f'{new_safe}{icon_path.suffix}'))
+
+# Metrics
+#
+# Optional Prometheus textfile-collector output (--metrics FILE or WEBBY_METRICS_FILE).
+# Samples are accumulated in memory and merged into the .prom file at exit.
+
+METRIC_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRIC_FAMILIES = {
+    'webby_operations_total': ('counter', 'Web app operations by type and result.'),
+    'webby_operation_duration_seconds': ('histogram', 'Duration of web app operations.'),
+    'webby_icon_downloads_total': ('counter', 'Icon downloads by result.'),
+    'webby_icon_download_bytes_total': ('counter', 'Bytes of icon data downloaded.'),
+    'webby_icon_download_duration_seconds': ('histogram', 'Duration of icon downloads.'),
+    'webby_icon_rasterize_duration_seconds': ('histogram', 'Time spent rendering an icon into theme sizes.'),
+    'webby_render_cache_total': ('counter', 'Icon size renders served from the render cache (hit) or ImageMagick (miss).'),
+    'webby_cache_refresh_duration_seconds': ('histogram', 'Duration of icon cache and desktop database refreshes.'),
+}
+
+METRIC_LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)\s*$')
+
+def _metric_labels(labels):
+    if not labels:
+        return ''
+    escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for key, value in sorted(labels.items()))
+    return '{' + ','.join(escaped) + '}'
+
+class Metrics:
+    """Counters and histograms written to a node-exporter textfile.
+    
+    Every series is additive (histograms are stored as cumulative bucket counts,
+    _sum and _count), so flushing adds this process's samples to the file's.
+    """
+    def __init__(self):
+        self.path = None
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _metric_labels(labels))
+        with self._lock:
+            self.samples[key] = self.samples.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        for bound in METRIC_BUCKETS:
+            if seconds <= bound:
+                self.inc(f'{name}_bucket', le=str(bound), **labels)
+        self.inc(f'{name}_bucket', le='+Inf', **labels)
+        self.inc(f'{name}_sum', seconds, **labels)
+        self.inc(f'{name}_count', **labels)
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start, **labels)
+
+    def flush(self):
+        """Merge this process's samples into the textfile and replace it atomically."""
+        if not self.enabled or not self.samples:
+            return
+        # Other webby processes may flush to the same file; merge under a lock
+        with file_lock(self.path.with_name(self.path.name + '.lock')):
+            merged = {}
+            try:
+                for line in Path(self.path).read_text().splitlines():
+                    match = METRIC_LINE.match(line)
+                    if match and not line.startswith('#'):
+                        merged[(match.group(1), match.group(2) or '')] = float(match.group(3))
+            except (OSError, ValueError):
+                pass
+            with self._lock:
+                for key, value in self.samples.items():
+                    merged[key] = merged.get(key, 0) + value
+                self.samples.clear()
+            
+            families = {}
+            for (name, labels), value in merged.items():
+                family = re.sub(r'_(bucket|sum|count)$', '', name) if name not in METRIC_FAMILIES else name
+                families.setdefault(family, []).append((name, labels, value))
+            lines = []
+            for family in sorted(families):
+                if family in METRIC_FAMILIES:
+                    metric_type, help_text = METRIC_FAMILIES[family]
+                    lines.append(f'# HELP {family} {help_text}')
+                    lines.append(f'# TYPE {family} {metric_type}')
+                for name, labels, value in sorted(families[family], key=_metric_sort_key):
+                    # repr() round-trips floats exactly, so sums keep accumulating across flushes
+                    lines.append(f'{name}{labels} {value!r}' if value != int(value) else f'{name}{labels} {int(value)}')
+            # node-exporter's textfile collector reads every *.prom file, temp files included
+            write_file_atomic(self.path, ('\n'.join(lines) + '\n').encode(), temp_suffix=self.path.suffix + '.tmp')
+
+def _metric_sort_key(sample):
+    name, labels, _ = sample
+    # Keep histogram buckets in numeric order, +Inf last
+    match = re.search(r'le="([^"]+)"', labels)
+    bound = float('inf') if not match or match.group(1) == '+Inf' else float(match.group(1))
+    return (name, re.sub(r',?le="[^"]+"', '', labels), bound)
+
+METRICS = Metrics()
+
+def enable_metrics(path):
+    """Start collecting metrics, flushed to path when the process exits."""
+    import atexit
+    if not METRICS.enabled:
+        atexit.register(METRICS.flush)
+    METRICS.path = Path(path)
+
+@contextlib.contextmanager
+def record_operation(operation):
+    """Count and time a web app operation."""
+    start = time.monotonic()
+    result = 'error'
+    try:
+        yield
+        result = 'ok'
+    finally:
+        METRICS.inc('webby_operations_total', operation=operation, result=result)
+        METRICS.observe('webby_operation_duration_seconds', time.monotonic() - start, operation=operation)
+
+class HttpError(Exception):
+    """Raised when a request fails after all retries or returns an error status."""
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class HttpResponse:
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+class HttpClient:
+    """Small HTTP/1.1 client with per-host keep-alive pools and retries.
+
+    Connections are kept alive and reused per (scheme, host, port), the number of
+    concurrent requests per host is bounded, transient failures are retried with
+    jittered exponential backoff, and concurrent GET/HEAD requests for the same URL
+    share a single network round trip.
+    """
+    RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+    MAX_RETRY_AFTER = 30.0
+    REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+    def __init__(self, timeout=HTTP_TIMEOUT, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF,
+                 max_per_host=HTTP_MAX_PER_HOST, max_idle_per_host=HTTP_MAX_IDLE_PER_HOST):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_per_host = max_per_host
+        self.max_idle_per_host = max_idle_per_host
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._slots = {}
+        self._inflight = {}
+
+    def get(self, url, headers=None, follow_redirects=True):
+        return self.request('GET', url, headers=headers, follow_redirects=follow_redirects)
+
+    def head(self, url, headers=None, follow_redirects=True):
+        return self.request('HEAD', url, headers=headers, follow_redirects=follow_redirects)
+
+    def request(self, method, url, headers=None, follow_redirects=True):
+        """Perform a request, coalescing identical concurrent GET/HEAD requests."""
+        if method not in ('GET', 'HEAD') or headers:
+            return self._request(method, url, headers, follow_redirects)
+        
+        key = (method, url, follow_redirects)
+        with self._lock:
+            flight = self._inflight.get(key)
+            owner = flight is None
+            if owner:
+                flight = _InFlight()
+                self._inflight[key] = flight
+        
+        if not owner:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return flight.response
+        
+        try:
+            flight.response = self._request(method, url, headers, follow_redirects)
+            return flight.response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def close(self):
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle.clear()
+        for pool in pools:
+            for conn in pool:
+                conn.close()
+
+    def _request(self, method, url, headers, follow_redirects):
+        for _ in range(HTTP_MAX_REDIRECTS + 1):
+            response = self._request_with_retries(method, url, headers)
+            location = response.headers.get('Location')
+            if not follow_redirects or response.status not in self.REDIRECT_STATUSES or not location:
+                if response.status >= 400:
+                    raise HttpError(f"HTTP {response.status} for {url}", response.status)
+                return response
+            url = urllib.parse.urljoin(url, location)
+            if response.status == 303:
+                method = 'GET'
+        raise HttpError(f"Too many redirects for {url}")
+
+    def _request_with_retries(self, method, url, headers):
+        attempt = 0
+        while True:
+            try:
+                response = self._send(method, url, headers)
+                if response.status not in self.RETRY_STATUSES or attempt >= self.retries:
+                    return response
+                delay = self._retry_after(response)
+                if delay is not None and delay > self.MAX_RETRY_AFTER:
+                    return response
+            except (OSError, http.client.HTTPException) as e:
+                if attempt >= self.retries:
+                    raise HttpError(f"{e.__class__.__name__}: {e}") from e
+                delay = None
+            if delay is None:
+                delay = random.uniform(0, self.backoff * (2 ** attempt))
+            else:
+                # Never retry sooner than the server asked; jitter on top of it
+                delay += random.uniform(0, self.backoff)
+            time.sleep(delay)
+            attempt += 1
+
+    def _retry_after(self, response):
+        value = response.headers.get('Retry-After', '')
+        if value.isdigit():
+            return float(value)
+        return None
+
+    def _send(self, method, url, headers):
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https') or not parts.hostname:
+            raise HttpError(f"Unsupported URL: {url}")
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        
+        request_headers = {
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        }
+        if headers:
+            request_headers.update(headers)
+        
+        slot = self._slot(key)
+        with slot:
+            conn, reused = self._checkout(key)
+            proxy_headers = getattr(conn, '_webby_proxy_headers', None)
+            if proxy_headers is not None:
+                path = url
+                request_headers.update(proxy_headers)
+            try:
+                conn.request(method, path, headers=request_headers)
+                raw = conn.getresponse()
+                body = raw.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if not reused:
+                    raise
+                # The server dropped an idle keep-alive connection; retry once on a fresh one
+                conn = self._connect(key)
+                try:
+                    conn.request(method, path, headers=request_headers)
+                    raw = conn.getresponse()
+                    body = raw.read()
+                except Exception:
+                    conn.close()
+                    raise
+            except Exception:
+                conn.close()
+                raise
+            
+            if raw.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+        
+        encoding = (raw.getheader('Content-Encoding') or '').lower()
+        # HEAD responses and empty bodies often carry the header with nothing to decode
+        if body and method != 'HEAD':
+            try:
+                if encoding == 'gzip':
+                    body = gzip.decompress(body)
+                elif encoding == 'deflate':
+                    try:
+                        body = zlib.decompress(body)
+                    except zlib.error:
+                        body = zlib.decompress(body, -zlib.MAX_WBITS)
+            except (OSError, EOFError, zlib.error) as e:
+                raise HttpError(f"Could not decode {encoding} response from {url}: {e}") from e
+        
+        return HttpResponse(url, raw.status, raw.headers, body)
+
+    def _slot(self, key):
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_per_host)
+                self._slots[key] = slot
+            return slot
+
+    def _checkout(self, key):
+        with self._lock:
+            pool = self._idle.get(key)
+            if pool:
+                return pool.pop(), True
+        return self._connect(key), False
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            pool = self._idle.setdefault(key, [])
+            if len(pool) < self.max_idle_per_host:
+                pool.append(conn)
+                return
+        conn.close()
+
+    def _connect(self, key):
+        scheme, host, port = key
+        proxy = urllib.request.getproxies().get(scheme)
+        if proxy and not urllib.request.proxy_bypass(host):
+            proxy_parts = urllib.parse.urlsplit(proxy if '://' in proxy else f'http://{proxy}')
+            proxy_host, proxy_port = proxy_parts.hostname, proxy_parts.port or 8080
+            proxy_headers = {}
+            if proxy_parts.username is not None:
+                # user:pass@proxy credentials, as urllib's ProxyHandler sends them
+                credentials = f'{urllib.parse.unquote(proxy_parts.username)}:{urllib.parse.unquote(proxy_parts.password or "")}'
+                proxy_headers['Proxy-Authorization'] = 'Basic ' + base64.b64encode(credentials.encode()).decode('ascii')
+            if scheme == 'https':
+                conn = http.client.HTTPSConnection(proxy_host, proxy_port, timeout=self.timeout)
+                conn.set_tunnel(host, port, headers=proxy_headers)
+            else:
+                conn = http.client.HTTPConnection(proxy_host, proxy_port, timeout=self.timeout)
+                # Plain requests go to the proxy with the absolute URL and its credentials
+                conn._webby_proxy_headers = proxy_headers
+            return conn
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+def get_http_client():
+    """Get the shared HTTP client used for all network I/O."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = HttpClient()
+        return _http_client
+
 def download_icon(url, app_name):
     icons_dir = get_icons_dir()
-    url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
     safe_name = sanitize_name(app_name)
     
     ext = '.png'
@@ -505,20 +1640,23 @@ def download_icon(url, app_name):
     elif '.gif' in url_lower:
         ext = '.gif'
     
-    temp_path = icons_dir / f"{safe_name}-{url_hash}-temp{ext}"
+    temp_path = temp_path_for(icons_dir / f'{safe_name}{ext}')
     
     try:
-        print(f"  {Colors.GRAY}Downloading icon...{Colors.RESET}", end='', flush=True)
+        print_status(f"  {Colors.GRAY}Downloading icon...{Colors.RESET}", end='')
         
-        request = urllib.request.Request(
-            url,
-            headers={'User-Agent': f'Mozilla/5.0 ({get_platform_name()}) Webby/1.1'}
-        )
-        
-        with urllib.request.urlopen(request, timeout=15) as response:
-            temp_path.write_bytes(response.read())
+        start = time.monotonic()
+        try:
+            response = get_http_client().get(url)
+        except Exception:
+            METRICS.inc('webby_icon_downloads_total', result='error')
+            raise
+        METRICS.observe('webby_icon_download_duration_seconds', time.monotonic() - start)
+        METRICS.inc('webby_icon_downloads_total', result='ok')
+        METRICS.inc('webby_icon_download_bytes_total', len(response.body))
+        temp_path.write_bytes(response.body)
         
-        print(f"\r  {Colors.GREEN}✓{Colors.RESET} Icon downloaded       ")
+        print_status(f"\r  {Colors.GREEN}✓{Colors.RESET} Icon downloaded       ")
         
         icon_name = install_icon_to_theme(temp_path, safe_name)
         
@@ -527,7 +1665,8 @@ def download_icon(url, app_name):
         return icon_name
         
     except Exception as e:
-        print(f"\r  {Colors.YELLOW}⚠{Colors.RESET} Could not download icon: {e}")
+        temp_path.unlink(missing_ok=True)
+        print_status(f"\r  {Colors.YELLOW}⚠{Colors.RESET} Could not download icon: {e}")
         return get_default_icon()
 
 def get_default_icon():
@@ -539,6 +1678,251 @@ def get_default_icon():
     else:
         return 'web-browser'
 
+# Icon theme lookup (Linux)
+#
+# Theme icon names are resolved through the active theme, its Inherits chain and
+# hicolor, using a name -> file index cached on disk and keyed by directory mtimes.
+
+ICON_EXTENSIONS = ('.png', '.svg', '.xpm')
+ICON_INDEX_VERSION = 1
+
+def get_cache_dir():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or str(Path.home() / '.cache')
+    return ensure_dir(Path(cache_home) / 'webby')
+
+def get_icon_base_dirs():
+    """Get the icon theme search path, in lookup order."""
+    data_home = os.environ.get('XDG_DATA_HOME') or str(Path.home() / '.local' / 'share')
+    data_dirs = os.environ.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share'
+    bases = [Path.home() / '.icons', Path(data_home) / 'icons']
+    if is_system_target():
+        bases.append(SYSTEM_PREFIX / 'share' / 'icons')
+    bases += [Path(d) / 'icons' for d in data_dirs.split(':') if d]
+    unique = []
+    for base in bases:
+        if base not in unique:
+            unique.append(base)
+    return unique
+
+def get_active_icon_theme():
+    """Get the configured icon theme name, or None for hicolor only."""
+    theme = os.environ.get('WEBBY_ICON_THEME')
+    if theme:
+        return theme
+    
+    config_home = Path(os.environ.get('XDG_CONFIG_HOME') or str(Path.home() / '.config'))
+    for settings in (config_home / 'gtk-4.0' / 'settings.ini', config_home / 'gtk-3.0' / 'settings.ini'):
+        parser = _read_ini(settings)
+        if parser and parser.has_option('Settings', 'gtk-icon-theme-name'):
+            return parser.get('Settings', 'gtk-icon-theme-name').strip('"\' ')
+    parser = _read_ini(config_home / 'kdeglobals')
+    if parser and parser.has_option('Icons', 'Theme'):
+        return parser.get('Icons', 'Theme')
+    
+    if shutil.which('gsettings'):
+        try:
+            result = subprocess.run(
+                ['gsettings', 'get', 'org.gnome.desktop.interface', 'icon-theme'],
+                capture_output=True, text=True, timeout=2
+            )
+            theme = result.stdout.strip().strip("'")
+            if result.returncode == 0 and theme:
+                return theme
+        except Exception:
+            pass
+    return None
+
+def _read_ini(path):
+    parser = configparser.ConfigParser(interpolation=None, strict=False)
+    parser.optionxform = str
+    try:
+        if parser.read(str(path), encoding='utf-8'):
+            return parser
+    except configparser.Error:
+        pass
+    return None
+
+def _theme_icon_dirs(theme, bases):
+    """Get (subdir, size) pairs for a theme from the first index.theme found."""
+    for base in bases:
+        parser = _read_ini(base / theme / 'index.theme')
+        if not parser or not parser.has_section('Icon Theme'):
+            continue
+        inherits = [t.strip() for t in parser.get('Icon Theme', 'Inherits', fallback='').split(',') if t.strip()]
+        names = parser.get('Icon Theme', 'Directories', fallback='').split(',')
+        names += parser.get('Icon Theme', 'ScaledDirectories', fallback='').split(',')
+        subdirs = []
+        for name in filter(None, (n.strip() for n in names)):
+            size = 0
+            if parser.has_section(name):
+                if parser.get(name, 'Type', fallback='Threshold') == 'Scalable':
+                    size = 4096
+                else:
+                    size = parser.getint(name, 'Size', fallback=0)
+            subdirs.append((name, size))
+        return subdirs, inherits
+    
+    # No index.theme (e.g. a bare ~/.local/share/icons/hicolor): use <size>/<context> dirs
+    subdirs = set()
+    for base in bases:
+        try:
+            with os.scandir(base / theme) as sizes:
+                for size_entry in sizes:
+                    if not size_entry.is_dir():
+                        continue
+                    with os.scandir(size_entry.path) as contexts:
+                        for context in contexts:
+                            if not context.is_dir():
+                                continue
+                            size_name = size_entry.name.split('x')[0]
+                            if size_entry.name == 'scalable':
+                                size = 4096
+                            else:
+                                size = int(size_name) if size_name.isdigit() else 0
+                            subdirs.add((f'{size_entry.name}/{context.name}', size))
+        except OSError:
+            pass
+    return sorted(subdirs), []
+
+def get_icon_theme_chain(theme=None):
+    """Get the active theme followed by everything it inherits, ending with hicolor."""
+    bases = get_icon_base_dirs()
+    chain = []
+    pending = [theme or get_active_icon_theme() or 'hicolor']
+    while pending:
+        name = pending.pop(0)
+        if name in chain or name == 'hicolor':
+            continue
+        chain.append(name)
+        pending = _theme_icon_dirs(name, bases)[1] + pending
+    chain.append('hicolor')
+    return chain
+
+def _dir_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+def build_icon_theme_index(chain):
+    """Scan the theme chain into (index, watched dir mtimes); index maps name -> [path, theme, size]."""
+    bases = get_icon_base_dirs()
+    index = {}
+    watched = {str(base): _dir_mtime(base) for base in bases}
+    for theme in chain:
+        subdirs, _ = _theme_icon_dirs(theme, bases)
+        found = {}
+        for base in bases:
+            theme_dir = base / theme
+            watched[str(theme_dir)] = _dir_mtime(theme_dir)
+            if not watched[str(theme_dir)]:
+                continue
+            for subdir, size in subdirs:
+                icon_dir = theme_dir / subdir
+                watched[str(icon_dir)] = _dir_mtime(icon_dir)
+                if not watched[str(icon_dir)]:
+                    continue
+                try:
+                    with os.scandir(icon_dir) as entries:
+                        for entry in entries:
+                            stem, ext = os.path.splitext(entry.name)
+                            if ext not in ICON_EXTENSIONS:
+                                continue
+                            current = found.get(stem)
+                            if current is None or size > current[2]:
+                                found[stem] = [entry.path, theme, size]
+                except OSError:
+                    pass
+        for name, record in found.items():
+            index.setdefault(name, record)
+    
+    # Unthemed fallback icons
+    pixmaps = Path('/usr/share/pixmaps')
+    watched[str(pixmaps)] = _dir_mtime(pixmaps)
+    try:
+        with os.scandir(pixmaps) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if ext in ICON_EXTENSIONS:
+                    index.setdefault(stem, [entry.path, '', 0])
+    except OSError:
+        pass
+    return index, watched
+
+_icon_index = None
+
+def get_icon_theme_index():
+    """Get the name -> [path, theme, size] index for the active theme, rebuilding it when stale."""
+    global _icon_index
+    if _icon_index is not None:
+        return _icon_index
+    
+    chain = get_icon_theme_chain()
+    cache_file = get_cache_dir() / 'icon-index.json'
+    try:
+        cached = json.loads(cache_file.read_text())
+        if (cached.get('version') == ICON_INDEX_VERSION and cached.get('chain') == chain
+                and all(_dir_mtime(path) == mtime for path, mtime in cached['watched'].items())):
+            _icon_index = cached['index']
+            return _icon_index
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    
+    index, watched = build_icon_theme_index(chain)
+    try:
+        data = {'version': ICON_INDEX_VERSION, 'chain': chain, 'watched': watched, 'index': index}
+        write_file_atomic(cache_file, json.dumps(data).encode())
+    except OSError:
+        pass
+    _icon_index = index
+    return index
+
+def invalidate_icon_theme_index():
+    global _icon_index
+    _icon_index = None
+
+def update_icon_theme_index(icon_name):
+    """Re-resolve one of Webby's own (hicolor) icons in the loaded index after it changed."""
+    if _icon_index is None:
+        return
+    installed = [path for path in get_theme_icon_files(icon_name) if path.exists()]
+    if installed:
+        # get_theme_icon_files() lists sizes largest first, then scalable
+        path = installed[-1] if installed[-1].suffix == '.svg' else installed[0]
+        size = 4096 if path.suffix == '.svg' else int(path.parent.parent.name.split('x')[0])
+        _icon_index[icon_name] = [str(path), 'hicolor', size]
+    else:
+        _icon_index.pop(icon_name, None)
+
+def resolve_theme_icon(name):
+    """Get the file a theme icon name resolves to, or None."""
+    record = get_icon_theme_index().get(name)
+    return record[0] if record else None
+
+def suggest_theme_icons(query, limit=10):
+    """Rank theme icon names for a query: exact, prefix, substring, then fuzzy matches."""
+    index = get_icon_theme_index()
+    query_lower = query.lower()
+    ranked = []
+    for name in index:
+        name_lower = name.lower()
+        if name_lower == query_lower:
+            rank = 0
+        elif name_lower.startswith(query_lower):
+            rank = 1
+        elif query_lower in name_lower:
+            rank = 2
+        else:
+            continue
+        ranked.append((rank, len(name), name))
+    ranked.sort()
+    names = [name for _, _, name in ranked[:limit]]
+    if len(names) < limit:
+        for name in difflib.get_close_matches(query, list(index), n=limit, cutoff=0.6):
+            if name not in names:
+                names.append(name)
+    return names[:limit]
+
 def find_icon(icon_input, app_name):
     if not icon_input:
         return get_default_icon()
@@ -555,8 +1939,30 @@ def find_icon(icon_input, app_name):
         safe_name = sanitize_name(app_name)
         return install_icon_to_theme(os.path.abspath(expanded), safe_name)
     
+    # Theme icon name: check it resolves instead of silently producing a blank icon
+    problem = check_theme_icon(icon_input)
+    if problem:
+        print_status(f"  {Colors.YELLOW}⚠{Colors.RESET} {problem}")
+        return get_default_icon()
+    
     return icon_input
 
+def check_theme_icon(icon_input):
+    """Explain why an icon given as a theme name won't resolve, or return None if it's fine."""
+    if not IS_LINUX or not icon_input or icon_input.startswith(('http://', 'https://')):
+        return None
+    # The fallback itself is always accepted
+    if icon_input == get_default_icon():
+        return None
+    if os.path.exists(os.path.expanduser(icon_input)):
+        return None
+    index = get_icon_theme_index()
+    if index and icon_input not in index:
+        suggestions = suggest_theme_icons(icon_input, limit=5)
+        hint = f" (did you mean: {', '.join(suggestions)}?)" if suggestions else ''
+        return f"Icon '{icon_input}' not found in the icon theme{hint}"
+    return None
+
 def create_windows_shortcut(name, url, icon, browser, browser_flag, has_app_mode, browser_name):
     """Create a Windows shortcut (.lnk file)."""
     apps_dir = get_applications_dir()
@@ -598,10 +2004,14 @@ URL={url}
         shortcut_file = url_file
     
     # Save metadata
-    meta_file.write_text(f"URL={url}\nIcon={icon}\nBrowser={browser_name}\n")
+    meta_file.write_text(windows_metadata(url, icon, browser_name))
     
     return shortcut_file
 
+def windows_metadata(url, icon, browser_name):
+    """Content of the .webby file stored next to each Windows shortcut."""
+    return f"URL={url}\nIcon={icon}\nBrowser={browser_name}\n"
+
 def create_macos_app(name, url, icon, browser, browser_flag, has_app_mode, browser_name):
     """Create a macOS .app bundle."""
     apps_dir = get_applications_dir()
@@ -621,21 +2031,44 @@ def create_macos_app(name, url, icon, browser, browser_flag, has_app_mode, brows
     resources_dir.mkdir(parents=True, exist_ok=True)
     
     # Create the executable script
-    if has_app_mode:
-        exec_command = f'"{browser}" {browser_flag}"{url}"'
-    else:
-        exec_command = f'"{browser}" {browser_flag}"{url}"'
-    
-    script_content = f'''#!/bin/bash
-exec {exec_command}
-'''
-    
     script_file = macos_dir / name
-    script_file.write_text(script_content)
+    script_file.write_text(macos_launcher_script(url, browser, browser_flag))
     script_file.chmod(0o755)
     
     # Create Info.plist
-    plist_content = f'''<?xml version="1.0" encoding="UTF-8"?>
+    plist_file = contents_dir / 'Info.plist'
+    plist_file.write_text(macos_info_plist(name))
+    
+    install_macos_app_icon(icon, resources_dir)
+    
+    return app_bundle
+
+def install_macos_app_icon(icon, resources_dir):
+    """Copy an icon into a bundle's Resources as AppIcon, converting to .icns if possible."""
+    if icon and os.path.exists(icon):
+        icon_path = Path(icon)
+        if icon_path.suffix.lower() == '.icns':
+            shutil.copy2(icon, resources_dir / 'AppIcon.icns')
+        else:
+            # Try to convert to icns using sips
+            try:
+                dest_icns = resources_dir / 'AppIcon.icns'
+                subprocess.run(['sips', '-s', 'format', 'icns', str(icon), '--out', str(dest_icns)], capture_output=True)
+            except Exception:
+                # Just copy as-is
+                shutil.copy2(icon, resources_dir / f'AppIcon{icon_path.suffix}')
+
+def macos_launcher_script(url, browser, browser_flag):
+    """Shell script that launches a macOS web app bundle."""
+    exec_command = f'"{browser}" {browser_flag}"{url}"'
+    return f'''#!/bin/bash
+exec {exec_command}
+'''
+
+def macos_info_plist(name):
+    """Info.plist for a macOS web app bundle."""
+    safe_name = sanitize_name(name)
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
 <plist version="1.0">
 <dict>
@@ -660,41 +2093,38 @@ exec {exec_command}
 </dict>
 </plist>
 '''
-    
-    plist_file = contents_dir / 'Info.plist'
-    plist_file.write_text(plist_content)
-    
-    # Copy icon if available
-    if icon and os.path.exists(icon):
-        icon_path = Path(icon)
-        if icon_path.suffix.lower() == '.icns':
-            shutil.copy2(icon, resources_dir / 'AppIcon.icns')
-        else:
-            # Try to convert to icns using sips
-            try:
-                dest_icns = resources_dir / 'AppIcon.icns'
-                subprocess.run(['sips', '-s', 'format', 'icns', str(icon), '--out', str(dest_icns)], capture_output=True)
-            except Exception:
-                # Just copy as-is
-                shutil.copy2(icon, resources_dir / f'AppIcon{icon_path.suffix}')
-    
-    return app_bundle
 
 def create_linux_desktop_file(name, url, icon, browser, browser_flag, has_app_mode, browser_name):
     """Create a Linux .desktop file."""
-    applications_dir = get_applications_dir()
-    applications_dir.mkdir(parents=True, exist_ok=True)
+    applications_dir = ensure_dir(get_applications_dir())
     
     safe_name = sanitize_name(name)
     desktop_file = applications_dir / f"webby-{safe_name}.desktop"
     
-    if 'epiphany' in browser.lower() or 'gnome-web' in browser.lower():
-        profile_dir = get_epiphany_profile_dir(name)
-        exec_command = f'{browser} --application-mode --profile="{profile_dir}" "{url}"'
-    else:
-        exec_command = f'{browser} {browser_flag}"{url}"'
+    exec_command = linux_exec_command(name, url, browser, browser_flag, shared=is_system_target())
+    desktop_file.write_text(desktop_entry_content(name, icon, exec_command))
+    desktop_file.chmod(0o755)
     
-    desktop_content = f"""[Desktop Entry]
+    return desktop_file
+
+def linux_exec_command(name, url, browser, browser_flag, shared=False):
+    """Build the Exec= command line; shared apps resolve GNOME Web profiles per user."""
+    safe_name = sanitize_name(name)
+    if ('epiphany' in browser.lower() or 'gnome-web' in browser.lower()) and shared:
+        # Profiles are per user, so resolve $HOME when the app is launched
+        profile_dir = f'$HOME/.local/share/webby/epiphany-profiles/{safe_name}'
+        # Quote for sh too, so the URL and browser aren't expanded at launch
+        script = f'exec {shlex.quote(browser)} --application-mode --profile="{profile_dir}" {shlex.quote(url)}'
+        return f'sh -c "{escape_exec_arg(script)}"'
+    elif 'epiphany' in browser.lower() or 'gnome-web' in browser.lower():
+        profile_dir = get_epiphany_profile_dir(name)
+        return f'{browser} --application-mode --profile="{profile_dir}" "{url}"'
+    return f'{browser} {browser_flag}"{url}"'
+
+def desktop_entry_content(name, icon, exec_command):
+    """Content of a Webby .desktop file."""
+    safe_name = sanitize_name(name)
+    return f"""[Desktop Entry]
 Version=1.0
 Type=Application
 Name={name}
@@ -704,26 +2134,24 @@ Icon={icon}
 Terminal=false
 Categories=Network;WebBrowser;
 StartupWMClass={safe_name}
-StartupNotify=true
-Keywords=web;app;{safe_name};
-"""
-    
-    desktop_file.write_text(desktop_content)
-    desktop_file.chmod(0o755)
-    
-    return desktop_file
+StartupNotify=true
+Keywords=web;app;{safe_name};
+"""
 
 def create_desktop_file(name, url, icon, browser, browser_flag, has_app_mode, browser_name):
     """Create a desktop entry/shortcut for the current platform."""
     if IS_WINDOWS:
-        return create_windows_shortcut(name, url, icon, browser, browser_flag, has_app_mode, browser_name)
+        app_file = create_windows_shortcut(name, url, icon, browser, browser_flag, has_app_mode, browser_name)
     elif IS_MACOS:
-        return create_macos_app(name, url, icon, browser, browser_flag, has_app_mode, browser_name)
+        app_file = create_macos_app(name, url, icon, browser, browser_flag, has_app_mode, browser_name)
     else:
-        return create_linux_desktop_file(name, url, icon, browser, browser_flag, has_app_mode, browser_name)
+        app_file = create_linux_desktop_file(name, url, icon, browser, browser_flag, has_app_mode, browser_name)
+    _remember_app(app_file)
+    return app_file
 
 def delete_app(app):
     """Delete a web app."""
+    _forget_app(app)
     if IS_MACOS and app['file'].is_dir():
         shutil.rmtree(app['file'])
     else:
@@ -740,15 +2168,431 @@ def delete_app(app):
     update_desktop_database()
     print_success(f"Deleted '{app['name']}'")
 
-def update_icon_cache():
-    """Update icon cache (Linux only)."""
+# Icon theme cache
+#
+# Webby maintains the theme's icon-theme.cache (the mmap-able GTK icon cache
+# format, as written by gtk-update-icon-cache) itself, so adding an icon only
+# looks up the changed names instead of walking the whole theme. All integers
+# are big-endian; every structure is 4-byte aligned:
+#
+#   Header:    u16 major (1), u16 minor (0), u32 hash offset, u32 directory list offset
+#   Hash:      u32 n_buckets, u32 icon offset per bucket (0xffffffff if empty)
+#   Icon:      u32 next icon in chain, u32 name offset, u32 image list offset
+#   ImageList: u32 n_images, then per image: u16 directory index, u16 flags, u32 image data offset
+#   DirList:   u32 n_directories, u32 name offset per directory
+
+ICON_CACHE_NAME = 'icon-theme.cache'
+ICON_CACHE_NONE = 0xFFFFFFFF
+ICON_CACHE_FLAGS = {'.xpm': 1, '.svg': 2, '.png': 4, '.icon': 8}
+
+def icon_name_hash(name):
+    """GTK's icon name hash (h = h * 31 + c over signed chars, 32-bit)."""
+    data = os.fsencode(name)
+    if not data:
+        return 0
+    signed = [b - 256 if b > 127 else b for b in data]
+    h = signed[0] & ICON_CACHE_NONE
+    for c in signed[1:]:
+        h = ((h << 5) - h + c) & ICON_CACHE_NONE
+    return h
+
+def _cache_string(data, offset):
+    return os.fsdecode(data[offset:data.index(b'\0', offset)])
+
+def read_icon_theme_cache(path):
+    """Read an icon-theme.cache into (directories, {icon name: {directory index: flags}})."""
+    return parse_icon_theme_cache(Path(path).read_bytes())
+
+def parse_icon_theme_cache(data):
+    """Parse icon cache bytes; raises ValueError or struct.error if they are malformed."""
+    major, minor, hash_offset, dir_list_offset = struct.unpack_from('>HHII', data, 0)
+    if (major, minor) != (1, 0):
+        raise ValueError(f"Unsupported icon cache version {major}.{minor}")
+    
+    n_dirs, = struct.unpack_from('>I', data, dir_list_offset)
+    dir_offsets = struct.unpack_from(f'>{n_dirs}I', data, dir_list_offset + 4)
+    directories = [_cache_string(data, offset) for offset in dir_offsets]
+    
+    icons = {}
+    n_buckets, = struct.unpack_from('>I', data, hash_offset)
+    seen = set()
+    for icon_offset in struct.unpack_from(f'>{n_buckets}I', data, hash_offset + 4):
+        while icon_offset != ICON_CACHE_NONE:
+            if icon_offset in seen:
+                raise ValueError("Icon cache chains loop")
+            seen.add(icon_offset)
+            icon_offset, name_offset, images_offset = struct.unpack_from('>III', data, icon_offset)
+            n_images, = struct.unpack_from('>I', data, images_offset)
+            images = {}
+            for i in range(n_images):
+                dir_index, flags, _ = struct.unpack_from('>HHI', data, images_offset + 4 + i * 8)
+                images[dir_index] = flags
+            icons[_cache_string(data, name_offset)] = images
+    return directories, icons
+
+def _scan_icon_dir(theme_dir, directory):
+    """Map icon names in one theme subdirectory to their suffix flags."""
+    found = {}
+    try:
+        entries = os.scandir(Path(theme_dir) / directory)
+    except OSError:
+        return found
+    with entries:
+        for entry in entries:
+            name, ext = os.path.splitext(entry.name)
+            # Skip temp files other processes are still writing (see temp_path_for)
+            if ext in ICON_CACHE_FLAGS and not name.startswith('.'):
+                found[name] = found.get(name, 0) | ICON_CACHE_FLAGS[ext]
+    return found
+
+def scan_icon_theme(theme_dir):
+    """Walk a whole theme like gtk-update-icon-cache. Returns (directories, icons)."""
+    theme_dir = Path(theme_dir)
+    directories = []
+    icons = {}
+    for root, dirs, _ in os.walk(theme_dir, followlinks=True):
+        dirs.sort()
+        if Path(root) == theme_dir:
+            continue
+        directory = Path(root).relative_to(theme_dir).as_posix()
+        for name, flags in _scan_icon_dir(theme_dir, directory).items():
+            icons.setdefault(name, {})[len(directories)] = flags
+        directories.append(directory)
+    return directories, icons
+
+def _next_prime(n):
+    n = max(n, 2)
+    while any(n % d == 0 for d in range(2, int(n ** 0.5) + 1)):
+        n += 1
+    return n
+
+def build_icon_theme_cache(directories, icons):
+    """Serialize directories and {icon name: {directory index: flags}} into cache bytes."""
+    buf = bytearray(12)
+    
+    def align():
+        buf.extend(b'\0' * (-len(buf) % 4))
+    
+    def put_string(value):
+        offset = len(buf)
+        buf.extend(os.fsencode(value) + b'\0')
+        align()
+        return offset
+    
+    n_buckets = _next_prime(len(icons))
+    buckets = [[] for _ in range(n_buckets)]
+    for name in sorted(icons):
+        buckets[icon_name_hash(name) % n_buckets].append(name)
+    
+    hash_offset = len(buf)
+    buf.extend(b'\0' * (4 + 4 * n_buckets))
+    struct.pack_into('>I', buf, hash_offset, n_buckets)
+    
+    for index, chain in enumerate(buckets):
+        next_offset = ICON_CACHE_NONE
+        # Write each chain back to front so every icon can point at the next one
+        for name in reversed(chain):
+            images = sorted(icons[name].items())
+            icon_offset = len(buf)
+            buf.extend(b'\0' * 12)
+            name_offset = put_string(name)
+            images_offset = len(buf)
+            buf.extend(struct.pack('>I', len(images)))
+            for dir_index, flags in images:
+                buf.extend(struct.pack('>HHI', dir_index, flags, 0))
+            struct.pack_into('>III', buf, icon_offset, next_offset, name_offset, images_offset)
+            next_offset = icon_offset
+        struct.pack_into('>I', buf, hash_offset + 4 + 4 * index, next_offset)
+    
+    dir_list_offset = len(buf)
+    buf.extend(b'\0' * (4 + 4 * len(directories)))
+    struct.pack_into('>I', buf, dir_list_offset, len(directories))
+    for index, directory in enumerate(directories):
+        struct.pack_into('>I', buf, dir_list_offset + 4 + 4 * index, put_string(directory))
+    
+    struct.pack_into('>HHII', buf, 0, 1, 0, hash_offset, dir_list_offset)
+    return bytes(buf)
+
+def _icon_cache_is_current(theme_dir, cache_path, directories):
+    """Whether a cache can be patched: GTK still trusts it and it lists every directory."""
+    # GTK ignores a cache older than its theme directory, and so must we, or
+    # patching it would hide icons others added since and mark it valid again
+    if cache_path.stat().st_mtime_ns < theme_dir.stat().st_mtime_ns:
+        return False
+    
+    # Directories new to the cache (hicolor lays icons out as <size>/<context>)
+    known = set(directories)
+    parents = ['']
+    for _ in range(2):
+        subdirs = []
+        for parent in parents:
+            try:
+                with os.scandir(theme_dir / parent) as entries:
+                    subdirs += [f'{parent}{entry.name}' for entry in entries if entry.is_dir()]
+            except OSError:
+                return False
+        if not known.issuperset(subdirs):
+            return False
+        parents = [f'{subdir}/' for subdir in subdirs]
+    return True
+
+def write_icon_theme_cache(theme_dir, changed=None):
+    """Bring a theme's icon-theme.cache up to date and replace it atomically.
+    
+    With changed icon names, the existing cache is patched by looking those names
+    up in each cached directory; otherwise, or if the cache is missing, stale or
+    lacks a directory, the whole theme is rescanned.
+    """
+    theme_dir = Path(theme_dir)
+    cache_path = theme_dir / ICON_CACHE_NAME
+    
+    cached = None
+    if changed is not None:
+        try:
+            cached = read_icon_theme_cache(cache_path)
+            if not _icon_cache_is_current(theme_dir, cache_path, cached[0]):
+                cached = None
+        except (OSError, ValueError, struct.error):
+            cached = None
+    
+    if cached is None:
+        directories, icons = scan_icon_theme(theme_dir)
+    else:
+        directories, icons = cached
+        for name in changed:
+            icons.pop(name, None)
+        for index, directory in enumerate(directories):
+            for name in changed:
+                flags = 0
+                for ext, flag in ICON_CACHE_FLAGS.items():
+                    if (theme_dir / directory / f'{name}{ext}').exists():
+                        flags |= flag
+                if flags:
+                    icons.setdefault(name, {})[index] = flags
+    
+    icons = {name: images for name, images in icons.items() if images}
+    data = build_icon_theme_cache(directories, icons)
+    # Never install a cache that doesn't read back as written; update_icon_cache
+    # then falls back to gtk-update-icon-cache
+    if parse_icon_theme_cache(data) != (directories, icons):
+        raise ValueError("Icon cache did not round-trip")
+    write_file_atomic(cache_path, data)
+    
+    # GTK ignores a cache older than its theme directory, and renaming the cache
+    # into place just bumped the directory's mtime; match them like GTK does.
+    cache_mtime = cache_path.stat().st_mtime_ns
+    theme_stat = theme_dir.stat()
+    if theme_stat.st_mtime_ns > cache_mtime:
+        os.utime(theme_dir, ns=(theme_stat.st_atime_ns, cache_mtime))
+
+def rewrite_desktop_entry(desktop_file, changes):
+    """Replace (or add) keys in a .desktop file's [Desktop Entry] group, keeping every other line."""
+    lines = Path(desktop_file).read_text().splitlines()
+    header = None
+    in_main = False
+    remaining = dict(changes)
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith('['):
+            in_main = stripped == '[Desktop Entry]'
+            if in_main:
+                header = i
+            continue
+        key = line.split('=', 1)[0].strip()
+        if in_main and '=' in line and key in remaining:
+            lines[i] = f'{key}={remaining.pop(key)}'
+    if remaining:
+        insert_at = header + 1 if header is not None else 0
+        lines[insert_at:insert_at] = [f'{key}={value}' for key, value in remaining.items()]
+    write_file_atomic(desktop_file, ('\n'.join(lines) + '\n').encode(), mode=0o755)
+
+def _modify_linux_app(app, name, url, icon, browser):
+    entry = read_desktop_entry(app['file'])
+    old_safe, new_safe = sanitize_name(app['name']), sanitize_name(name)
+    desktop_file = app['file']
+    if new_safe != old_safe:
+        desktop_file = get_applications_dir() / f'webby-{new_safe}.desktop'
+        os.replace(app['file'], desktop_file)
+        
+        # Keep the GNOME Web profile (cookies, logins) of the current user
+        old_profile = Path.home() / '.local' / 'share' / 'webby' / 'epiphany-profiles' / old_safe
+        new_profile = old_profile.with_name(new_safe)
+        if not is_system_target() and old_profile.is_dir() and not new_profile.exists():
+            os.rename(old_profile, new_profile)
+            _created_dirs.discard(old_profile)
+    
+    exec_command = linux_exec_command(name, url, browser.command, browser.flag, shared=is_system_target())
+    wanted = {'Name': name, 'Exec': exec_command, 'Icon': icon}
+    if new_safe != old_safe:
+        if entry.get('StartupWMClass') == old_safe:
+            wanted['StartupWMClass'] = new_safe
+        if 'Keywords' in entry:
+            wanted['Keywords'] = ';'.join(new_safe if k == old_safe else k for k in entry['Keywords'].split(';'))
+    changes = {key: value for key, value in wanted.items() if entry.get(key) != value}
+    if changes:
+        rewrite_desktop_entry(desktop_file, changes)
+    return desktop_file
+
+def _modify_macos_app(app, name, url, icon, browser, icon_changed):
+    app_bundle = app['file']
+    if name != app['name']:
+        app_bundle = app['file'].with_name(f'{name}.app')
+        os.rename(app['file'], app_bundle)
+        os.rename(app_bundle / 'Contents' / 'MacOS' / app['name'], app_bundle / 'Contents' / 'MacOS' / name)
+        write_file_atomic(app_bundle / 'Contents' / 'Info.plist', macos_info_plist(name).encode())
+    
+    script_file = app_bundle / 'Contents' / 'MacOS' / name
+    script = macos_launcher_script(url, browser.command, browser.flag)
+    if script_file.read_text() != script:
+        write_file_atomic(script_file, script.encode(), mode=0o755)
+    if icon_changed:
+        install_macos_app_icon(icon, app_bundle / 'Contents' / 'Resources')
+    return app_bundle
+
+def _modify_windows_app(app, name, url, icon, browser):
+    shortcut_file = app['file']
+    meta_file = shortcut_file.with_suffix('.webby')
+    if name != app['name']:
+        shortcut_file = shortcut_file.with_name(f'{name}{shortcut_file.suffix}')
+        os.replace(app['file'], shortcut_file)
+        if meta_file.exists():
+            new_meta_file = meta_file.with_name(f'{name}.webby')
+            os.replace(meta_file, new_meta_file)
+            meta_file = new_meta_file
+    
+    # The shortcut itself embeds URL, browser and icon; only rebuild it if one changed
+    current = meta_file.read_text() if meta_file.exists() else ''
+    if current != windows_metadata(url, icon, browser.name):
+        shortcut_file = create_windows_shortcut(name, url, icon, *browser.as_tuple())
+    return shortcut_file
+
+def _check_rename_target(app, name):
+    """Refuse a rename whose launcher or icon files belong to another app.
+    
+    Files are named after the sanitized name, so a different display name can
+    still land on another app's desktop file, bundle, shortcut or icons.
+    """
+    target = get_app_file(name)
+    if target.exists() and not os.path.samefile(target, app['file']):
+        raise WebbyError(f"Cannot rename to '{name}': {target.name} belongs to another app")
+    
+    safe = sanitize_name(name)
+    if safe == sanitize_name(app['name']):
+        return
+    for other in get_webby_apps().values():
+        icon = other.get('icon') or ''
+        if IS_LINUX:
+            owned = icon == f'webby-{safe}'
+        else:
+            owned = Path(icon).parent == get_icons_dir() and Path(icon).stem == safe
+        if owned and other['name'].lower() != app['name'].lower():
+            raise WebbyError(f"Cannot rename to '{name}': its icon belongs to '{other['name']}'")
+
+def modify_app(app, name, url, icon_input, browser):
+    """Change an installed app in place: rename its files and rewrite only what changed.
+    
+    name, url and browser (a Browser) are the final values; icon_input is a new
+    icon (theme name, path or URL) or None to keep the current one. Returns the
+    app file and its icon.
+    """
+    renamed = name != app['name']
+    if renamed:
+        _check_rename_target(app, name)
+    _forget_app(app)
+    
+    if icon_input:
+        icon = find_icon(icon_input, name)
+        # The old name's icons are no longer referenced by anything
+        if renamed and icon != app['icon'] and app.get('icon', '').startswith('webby-'):
+            remove_icon_from_theme(app['icon'])
+    elif renamed:
+        icon = rename_app_icon(app['icon'], app['name'], name)
+    else:
+        icon = app['icon']
+    
+    if IS_WINDOWS:
+        app_file = _modify_windows_app(app, name, url, icon, browser)
+    elif IS_MACOS:
+        app_file = _modify_macos_app(app, name, url, icon, browser, bool(icon_input))
+    else:
+        app_file = _modify_linux_app(app, name, url, icon, browser)
+    
+    _remember_app(app_file)
+    update_desktop_database()
+    return app_file, icon
+
+# Cache refreshes requested while deferred run once when the outermost
+# deferred_refresh() block exits. None in _pending_icon_names means a full rebuild.
+_refresh_depth = 0
+_pending_refreshes = set()
+_pending_icon_names = set()
+
+@contextlib.contextmanager
+def deferred_refresh():
+    """Collapse icon cache and desktop database refreshes into a single run."""
+    global _refresh_depth
+    _refresh_depth += 1
+    try:
+        yield
+    finally:
+        _refresh_depth -= 1
+        if _refresh_depth == 0:
+            flush_refreshes()
+
+def flush_refreshes():
+    """Run pending refreshes now, even inside an outer deferred_refresh() block."""
+    global _refresh_depth
+    depth, _refresh_depth = _refresh_depth, 0
+    try:
+        pending = set(_pending_refreshes)
+        _pending_refreshes.clear()
+        icon_names = set(_pending_icon_names)
+        _pending_icon_names.clear()
+        if 'icons' in pending:
+            update_icon_cache(None if None in icon_names else icon_names)
+        if 'desktop' in pending:
+            update_desktop_database()
+    finally:
+        _refresh_depth = depth
+
+def _defer_refresh(kind):
+    """Record a refresh for later if refreshes are currently deferred."""
+    if _refresh_depth > 0:
+        _pending_refreshes.add(kind)
+        return True
+    return False
+
+def update_icon_cache(changed=None):
+    """Update icon cache (Linux only).
+    
+    changed lists the icon names that were installed or removed; only those are
+    looked up again. Without it the whole theme is rescanned.
+    """
     if not IS_LINUX:
         return
+    # Lookups must see the change right away, even when the cache rebuild is deferred
+    if changed is None:
+        invalidate_icon_theme_index()
+    else:
+        for name in changed:
+            update_icon_theme_index(name)
+    if _defer_refresh('icons'):
+        _pending_icon_names.update(changed if changed is not None else [None])
+        return
+    
+    icon_dir = get_hicolor_base()
+    try:
+        with refresh_lock(), METRICS.timer('webby_cache_refresh_duration_seconds', cache='icon'):
+            write_icon_theme_cache(icon_dir, changed)
+        return
+    except Exception:
+        pass
     
-    icon_dir = Path.home() / '.local' / 'share' / 'icons' / 'hicolor'
+    # Fall back to the GTK tools if the cache could not be written
     if shutil.which('gtk-update-icon-cache'):
         try:
-            subprocess.run(['gtk-update-icon-cache', '-f', '-t', str(icon_dir)], capture_output=True)
+            with refresh_lock(), METRICS.timer('webby_cache_refresh_duration_seconds', cache='icon'):
+                subprocess.run(['gtk-update-icon-cache', '-f', '-t', str(icon_dir)], capture_output=True)
         except Exception:
             pass
     if shutil.which('xdg-icon-resource'):
@@ -757,19 +2601,542 @@ def update_icon_cache():
         except Exception:
             pass
 
+def get_registry_path():
+    """Get the registry of system-wide apps (--system only)."""
+    return get_data_dir() / 'registry.json'
+
+def update_registry():
+    """Rewrite the system-wide app registry from the installed apps."""
+    if not is_system_target():
+        return
+    apps = []
+    for app in sorted(get_webby_apps().values(), key=lambda a: a['name'].lower()):
+        apps.append({
+            'name': app['name'],
+            'url': app['url'],
+            'icon': app['icon'],
+            'browser': app.get('browser', ''),
+            'file': str(app['file']),
+        })
+    data = json.dumps({'version': 1, 'updated': int(time.time()), 'apps': apps}, indent=2)
+    write_file_atomic(get_registry_path(), (data + '\n').encode())
+
 def update_desktop_database():
-    """Update desktop database (Linux only)."""
-    if not IS_LINUX:
+    """Update desktop database (Linux only) and the system-wide registry."""
+    if _defer_refresh('desktop'):
         return
     
-    if shutil.which('update-desktop-database'):
+    with refresh_lock():
+        update_registry()
+        if not IS_LINUX:
+            return
+        
+        if shutil.which('update-desktop-database'):
+            try:
+                with METRICS.timer('webby_cache_refresh_duration_seconds', cache='desktop'):
+                    subprocess.run(
+                        ['update-desktop-database', str(get_applications_dir())],
+                        capture_output=True
+                    )
+            except Exception:
+                pass
+
+# Library API
+#
+# Importable functions for use from other Python programs (``import webby``).
+# They return values and raise WebbyError instead of printing or exiting.
+
+class WebbyError(Exception):
+    """Raised by the library API when an operation cannot be completed."""
+
+@dataclass
+class Browser:
+    __slots__ = ('command', 'flag', 'app_mode', 'name')
+    command: str
+    flag: str
+    app_mode: bool
+    name: str
+
+    def as_tuple(self):
+        return (self.command, self.flag, self.app_mode, self.name)
+
+    def as_dict(self):
+        return {'command': self.command, 'flag': self.flag, 'app_mode': self.app_mode, 'name': self.name}
+
+@dataclass
+class WebApp:
+    __slots__ = ('name', 'url', 'icon', 'browser', 'file')
+    name: str
+    url: str
+    icon: str
+    browser: str
+    file: Path
+
+    @classmethod
+    def from_record(cls, app):
+        return cls(app['name'], app['url'], app['icon'], app.get('browser', ''), app['file'])
+
+    def as_dict(self):
+        return {'name': self.name, 'url': self.url, 'icon': self.icon, 'browser': self.browser, 'file': str(self.file)}
+
+def detect_browsers():
+    """Return the installed browsers, best first."""
+    return [Browser(*browser) for browser in detect_all_browsers()]
+
+def list_apps():
+    """Return all installed web apps."""
+    return [WebApp.from_record(app) for app in get_webby_apps().values()]
+
+def get_app(name):
+    """Return the web app with exactly this name (case-insensitive)."""
+    app = get_webby_apps().get(name.lower())
+    if not app:
+        raise WebbyError(f"Web app '{name}' not found")
+    return WebApp.from_record(app)
+
+def _resolve_browser(browser=None, current=None):
+    """Pick a Browser from a Browser, display name or command, keeping current if possible."""
+    if isinstance(browser, Browser):
+        return browser
+    available = detect_browsers()
+    if not available:
+        raise WebbyError("No compatible browser found")
+    wanted = browser or current
+    if wanted:
+        for candidate in available:
+            if wanted in (candidate.name, candidate.command):
+                return candidate
+        if browser:
+            raise WebbyError(f"Browser '{browser}' not found")
+    return available[0]
+
+def _check_icon(icon):
+    """Refuse theme icon names that don't resolve rather than quietly using a default."""
+    problem = check_theme_icon(icon)
+    if problem:
+        raise WebbyError(problem)
+
+def _normalize_url(url):
+    url = (url or '').strip()
+    if url and not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    if not validate_url(url):
+        raise WebbyError(f"Invalid URL: '{url}'")
+    return url
+
+def _remove_app_files(app):
+    """Remove an app's launcher but keep its icons."""
+    _forget_app(app)
+    if IS_MACOS and app['file'].is_dir():
+        shutil.rmtree(app['file'])
+    else:
+        app['file'].unlink(missing_ok=True)
+
+def _created_app(app_file, name, url, icon, browser):
+    """Read back a freshly written app, so records match what list_apps() returns."""
+    app = _read_app(app_file)
+    if app:
+        return WebApp.from_record(app)
+    return WebApp(name, url, icon, browser.command, app_file)
+
+def create(name, url, icon=None, browser=None, replace=False):
+    """Create a web app and return it.
+    
+    icon may be a theme name, file path or image URL; browser may be a Browser,
+    display name or command (default: the best installed browser).
+    """
+    # Count rejected input as a failed operation too
+    with record_operation('create'):
+        name = (name or '').strip()
+        if not name:
+            raise WebbyError("App name is required")
+        url = _normalize_url(url)
+        chosen = _resolve_browser(browser)
+        _check_icon(icon)
+        
+        with app_lock(name), quiet_output():
+            existing = reload_app(name)
+            if existing and not replace:
+                raise WebbyError(f"Web app '{existing['name']}' already exists")
+            final_icon = find_icon(icon, name)
+            if existing:
+                _remove_app_files(existing)
+            app_file = create_desktop_file(name, url, final_icon, *chosen.as_tuple())
+            update_desktop_database()
+    return _created_app(app_file, name, url, final_icon, chosen)
+
+def update(name, new_name=None, url=None, icon=None, browser=None):
+    """Change an existing web app's name, URL, icon or browser and return it."""
+    with record_operation('edit'):
+        new_name = (new_name or '').strip()
+        _check_icon(icon)
+        with app_lock(name, new_name or name), quiet_output():
+            app = reload_app(name)
+            if not app:
+                raise WebbyError(f"Web app '{name}' not found")
+            
+            final_name = new_name or app['name']
+            renamed = final_name.lower() != app['name'].lower()
+            if renamed and reload_app(final_name):
+                raise WebbyError(f"Web app '{final_name}' already exists")
+            final_url = _normalize_url(url or app['url'])
+            chosen = _resolve_browser(browser, app.get('browser'))
+            
+            app_file, final_icon = modify_app(app, final_name, final_url, icon, chosen)
+    return _created_app(app_file, final_name, final_url, final_icon, chosen)
+
+def delete(name):
+    """Delete a web app and return the removed app."""
+    with record_operation('delete'), app_lock(name), quiet_output():
+        app = reload_app(name)
+        if not app:
+            raise WebbyError(f"Web app '{name}' not found")
+        delete_app(app)
+    return WebApp.from_record(app)
+
+# Batch mode: newline-delimited JSON commands on stdin, one JSON result per line on stdout
+
+BATCH_OPS = {
+    'create': lambda cmd: create(cmd.get('name'), cmd.get('url'), cmd.get('icon'), cmd.get('browser'), bool(cmd.get('replace'))).as_dict(),
+    'update': lambda cmd: update(cmd['name'], cmd.get('new_name'), cmd.get('url'), cmd.get('icon'), cmd.get('browser')).as_dict(),
+    'delete': lambda cmd: delete(cmd['name']).as_dict(),
+    'get': lambda cmd: get_app(cmd['name']).as_dict(),
+    'list': lambda cmd: [app.as_dict() for app in list_apps()],
+    'browsers': lambda cmd: [browser.as_dict() for browser in detect_browsers()],
+}
+
+BATCH_STRING_FIELDS = ('name', 'new_name', 'url', 'icon', 'browser')
+
+def run_batch_command(line):
+    """Run one NDJSON batch command and return its result object."""
+    command_id = None
+    try:
+        command = json.loads(line)
+        if not isinstance(command, dict):
+            raise WebbyError("Command must be a JSON object")
+        command_id = command.get('id')
+        op = BATCH_OPS.get(command.get('op'))
+        if op is None:
+            raise WebbyError(f"Unknown op: {command.get('op')!r}")
+        for field in BATCH_STRING_FIELDS:
+            if command.get(field) is not None and not isinstance(command[field], str):
+                raise WebbyError(f"Field '{field}' must be a string")
+        result = {'ok': True, 'result': op(command)}
+    except KeyError as e:
+        result = {'ok': False, 'error': f"Missing field: {e.args[0]}"}
+    except (WebbyError, ValueError, OSError) as e:
+        result = {'ok': False, 'error': str(e)}
+    except Exception as e:
+        # One bad command must not end the whole session
+        result = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+    if command_id is not None:
+        result['id'] = command_id
+    return result
+
+def run_batch(input_stream, output_stream):
+    """Process batch commands until EOF, refreshing system caches once at the end."""
+    with app_session(), deferred_refresh(), quiet_output():
+        for line in input_stream:
+            if not line.strip():
+                continue
+            output_stream.write(json.dumps(run_batch_command(line)) + '\n')
+            output_stream.flush()
+
+# Health checks (webby --doctor)
+
+DOCTOR_DEADLINE = 20
+DOCTOR_WORKERS = 16
+
+def _check(ok, detail='', severity='error', **extra):
+    result = {'ok': ok, 'detail': detail, 'severity': 'ok' if ok else severity}
+    result.update(extra)
+    return result
+
+def check_app_browser(app):
+    browser = app.get('browser', '')
+    if not browser:
+        return _check(False, 'no browser recorded')
+    if IS_WINDOWS:
+        found = any(b[3] == browser or b[0] == browser for b in detect_all_browsers())
+    elif os.path.isabs(browser):
+        found = os.path.isfile(browser)
+    else:
+        found = shutil.which(browser) is not None
+    return _check(found, browser if found else f"'{browser}' not found")
+
+def check_app_icon(app):
+    icon = app.get('icon', '')
+    # Only Linux has a default theme icon that --fix can point an app at
+    unfixable = {} if IS_LINUX else {'fixable': False}
+    if IS_MACOS:
+        found = any((app['file'] / 'Contents' / 'Resources').glob('AppIcon.*'))
+        return _check(found, '' if found else 'no AppIcon in bundle', severity='warning', **({} if found else unfixable))
+    if not icon:
+        return _check(True, 'default icon')
+    if IS_LINUX and icon.startswith('webby-'):
+        found = bool(get_app_icon_files(app))
+    elif os.path.isabs(icon):
+        found = os.path.isfile(icon)
+    elif IS_LINUX:
+        index = get_icon_theme_index()
+        found = not index or icon in index
+    else:
+        found = True
+    return _check(found, icon if found else f"'{icon}' does not resolve", severity='warning', **({} if found else unfixable))
+
+def check_app_artifact(app):
+    path = app['file']
+    try:
+        if IS_MACOS:
+            with open(path / 'Contents' / 'Info.plist', 'rb') as f:
+                plist = plistlib.load(f)
+            executable = path / 'Contents' / 'MacOS' / plist.get('CFBundleExecutable', '')
+            ok = os.access(executable, os.X_OK)
+            return _check(ok, '' if ok else 'launcher script missing or not executable')
+        elif IS_WINDOWS:
+            header = path.read_bytes()[:20]
+            ok = path.suffix.lower() == '.url' or (header[:4] == struct.pack('<I', 0x4C) and header[4:20] == LNK_CLSID)
+            return _check(ok, '' if ok else 'not a valid shortcut')
+        entry = read_desktop_entry(path)
+        missing = [key for key in ('Type', 'Name', 'Exec') if not entry.get(key)]
+        return _check(not missing, f"missing {', '.join(missing)}" if missing else '')
+    except (OSError, ValueError, plistlib.InvalidFileException) as e:
+        return _check(False, str(e))
+
+def probe_app_url(client, url):
+    """Check that a URL answers; permanent redirects are reported with their target."""
+    if not validate_url(url):
+        return _check(False, f"invalid URL '{url}'")
+    try:
         try:
-            subprocess.run(
-                ['update-desktop-database', str(get_applications_dir())],
-                capture_output=True
-            )
-        except Exception:
+            response = client.head(url, follow_redirects=False)
+        except HttpError as e:
+            # Some servers refuse HEAD; ask again with GET
+            if e.status not in (405, 501):
+                raise
+            response = client.get(url, follow_redirects=False)
+    except HttpError as e:
+        return _check(False, str(e))
+    location = response.headers.get('Location')
+    if response.status in (301, 308) and location:
+        target = urllib.parse.urljoin(url, location)
+        return _check(False, f'moved permanently to {target}', severity='warning', location=target)
+    return _check(True, f'HTTP {response.status}')
+
+def diagnose_apps(apps=None, check_urls=True, deadline=DOCTOR_DEADLINE):
+    """Check every app's browser, icon, artifact and URL; returns one report per app.
+    
+    URLs are probed concurrently; probes still running at the deadline are
+    reported as timed out.
+    """
+    if apps is None:
+        apps = list(get_webby_apps().values())
+    
+    reports = []
+    for app in apps:
+        reports.append({
+            'name': app['name'],
+            'url': app['url'],
+            'file': str(app['file']),
+            'checks': {
+                'browser': check_app_browser(app),
+                'icon': check_app_icon(app),
+                'artifact': check_app_artifact(app),
+            },
+        })
+    
+    if check_urls and reports:
+        client = HttpClient(timeout=min(HTTP_TIMEOUT, deadline), retries=1)
+        results = {}
+        jobs = iter(range(len(reports)))
+        jobs_lock = threading.Lock()
+        
+        def probe_worker():
+            while True:
+                with jobs_lock:
+                    index = next(jobs, None)
+                if index is None:
+                    return
+                try:
+                    results[index] = probe_app_url(client, reports[index]['url'])
+                except Exception as e:
+                    results[index] = _check(False, str(e))
+        
+        # Daemon threads, so probes still hanging at the deadline can't delay exit
+        end = time.monotonic() + deadline
+        workers = [threading.Thread(target=probe_worker, daemon=True) for _ in range(min(DOCTOR_WORKERS, len(reports)))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(max(0, end - time.monotonic()))
+        
+        for index, report in enumerate(reports):
+            report['checks']['url'] = results.get(index) or _check(False, f'no answer within {deadline}s', severity='warning')
+        if not any(worker.is_alive() for worker in workers):
+            client.close()
+    
+    for report in reports:
+        report['status'] = _report_status(report['checks'])
+    return reports
+
+def _report_status(checks):
+    severities = [check['severity'] for check in checks.values()]
+    return 'error' if 'error' in severities else 'warning' if 'warning' in severities else 'ok'
+
+def fix_app(report):
+    """Repair what the doctor can through the regular update path; returns the changes made."""
+    checks = report['checks']
+    changes = {}
+    if not checks['browser']['ok']:
+        changes['browser'] = None
+    if not checks['icon']['ok'] and checks['icon'].get('fixable', True):
+        changes['icon'] = get_default_icon()
+    if 'location' in checks.get('url', {}):
+        changes['url'] = checks['url']['location']
+    if not changes:
+        return {}
+    
+    app = update(report['name'], url=changes.get('url'), icon=changes.get('icon'))
+    if 'browser' in changes:
+        changes['browser'] = app.browser
+    return changes
+
+def recheck_fixed_app(report):
+    """Status of a report's app after fix_app(), re-running the local checks."""
+    checks = dict(report['checks'])
+    fixed = report.get('fixed') or {}
+    app = reload_app(report['name'])
+    if app:
+        checks['browser'] = check_app_browser(app)
+        checks['icon'] = check_app_icon(app)
+        checks['artifact'] = check_app_artifact(app)
+    if 'url' in fixed and 'error' not in fixed:
+        checks['url'] = _check(True, f"now {fixed['url']}")
+    return _report_status(checks)
+
+# Watch mode: keep apps pointing at installed browsers as packages come and go
+
+WATCH_DEBOUNCE = 0.5
+WATCH_POLL_INTERVAL = 5
+
+# inotify(7) event masks
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+WATCH_EVENTS = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+def get_watch_dirs():
+    """Directories whose changes can add or remove a browser or an app."""
+    if IS_WINDOWS:
+        candidates = [os.path.dirname(expand_windows_path(b[0])) for b in BROWSERS_WINDOWS]
+    elif IS_MACOS:
+        candidates = ['/Applications', str(Path.home() / 'Applications')]
+    else:
+        candidates = os.environ.get('PATH', '').split(os.pathsep)
+    
+    dirs = []
+    seen = set()
+    for candidate in [*candidates, str(ensure_dir(get_applications_dir()))]:
+        real = os.path.realpath(candidate) if candidate else ''
+        if real and real not in seen:
+            seen.add(real)
+            dirs.append(real)
+    return dirs
+
+class PollingWatcher:
+    """Notice changes by comparing directory mtimes every few seconds."""
+    def __init__(self, dirs, interval=WATCH_POLL_INTERVAL):
+        self.dirs = dirs
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self):
+        snapshot = {}
+        for path in self.dirs:
+            try:
+                snapshot[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                snapshot[path] = None
+        return snapshot
+
+    def wait(self):
+        """Block until a watched directory changes."""
+        while True:
+            time.sleep(self.interval)
+            snapshot = self._snapshot()
+            if snapshot != self.snapshot:
+                self.snapshot = snapshot
+                return
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Block on inotify events for a set of directories (Linux)."""
+    def __init__(self, dirs):
+        import ctypes
+        import ctypes.util
+        self.dirs = dirs
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._add_watches()
+
+    def _add_watches(self):
+        # Re-adding an existing watch is a no-op, and picks up directories that
+        # were (re)created since the last call
+        for path in self.dirs:
+            self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_EVENTS)
+
+    def wait(self):
+        """Block until a watched directory changes, then let the burst settle."""
+        select.select([self.fd], [], [])
+        os.read(self.fd, 65536)
+        while select.select([self.fd], [], [], WATCH_DEBOUNCE)[0]:
+            os.read(self.fd, 65536)
+        self._add_watches()
+
+    def close(self):
+        os.close(self.fd)
+
+def open_watcher(dirs):
+    """Use inotify where available, otherwise fall back to polling."""
+    if IS_LINUX:
+        try:
+            return InotifyWatcher(dirs)
+        except (OSError, AttributeError):
             pass
+    return PollingWatcher(dirs)
+
+def sync_browser_apps():
+    """Repoint apps whose browser is gone at the best installed browser.
+    
+    Returns (name, old browser, new browser) for every app that was changed.
+    """
+    changes = []
+    with app_session(), deferred_refresh(), quiet_output():
+        for app in list(get_webby_apps().values()):
+            if check_app_browser(app)['ok']:
+                continue
+            try:
+                updated = update(app['name'])
+            except WebbyError:
+                continue
+            changes.append((app['name'], app.get('browser', ''), updated.browser))
+        # Apps may also have been added, edited or removed by hand
+        if is_system_target():
+            with refresh_lock():
+                update_registry()
+    # Each sync ends in a real refresh, whatever deferral the caller is in
+    flush_refreshes()
+    return changes
 
 def show_browser_selection(browsers):
     print(f"\n{Colors.GRAY}┌{'─' * 46}┐{Colors.RESET}")
@@ -849,7 +3216,12 @@ def cmd_delete(name):
     confirm = input(f"\n  {Colors.WHITE}▸ {Colors.RESET}").strip().lower()
     
     if confirm == 'yes' or confirm == 'y':
-        delete_app(app)
+        with app_lock(app['name']), record_operation('delete'):
+            current = reload_app(app['name'])
+            if current:
+                delete_app(current)
+            else:
+                print_error(f"Web app '{app['name']}' not found")
     else:
         print_info("Cancelled")
 
@@ -863,32 +3235,28 @@ def cmd_edit(name, new_name=None, new_url=None, new_icon=None):
     
     print_info(f"Editing '{Colors.CYAN}{app['name']}{Colors.RESET}'")
     
-    browser, browser_flag, has_app_mode, browser_name = detect_browser()
-    if not browser:
-        print_error("No compatible browser found!")
+    # Re-read the app under its lock so a parallel edit isn't overwritten
+    try:
+        with record_operation('edit'), app_lock(app['name'], new_name or app['name']):
+            app = reload_app(app['name'])
+            if not app:
+                raise WebbyError(f"Web app '{name}' not found")
+            browser = _resolve_browser(None, app.get('browser'))
+            
+            final_name = new_name if new_name else app['name']
+            final_url = new_url if new_url else app['url']
+            
+            if final_name.lower() != app['name'].lower() and reload_app(final_name):
+                raise WebbyError(f"Web app '{final_name}' already exists")
+            
+            if not final_url.startswith(('http://', 'https://')):
+                final_url = 'https://' + final_url
+            
+            _, final_icon = modify_app(app, final_name, final_url, new_icon, browser)
+    except WebbyError as e:
+        print_error(f"{e}!")
         return
     
-    final_name = new_name if new_name else app['name']
-    final_url = new_url if new_url else app['url']
-    final_icon = app['icon']
-    
-    if new_icon:
-        final_icon = find_icon(new_icon, final_name)
-    
-    if not final_url.startswith(('http://', 'https://')):
-        final_url = 'https://' + final_url
-    
-    if new_name and new_name.lower() != app['name'].lower():
-        delete_app(app)
-    else:
-        if IS_MACOS and app['file'].is_dir():
-            shutil.rmtree(app['file'])
-        else:
-            app['file'].unlink(missing_ok=True)
-    
-    desktop_file = create_desktop_file(final_name, final_url, final_icon, browser, browser_flag, has_app_mode, browser_name)
-    update_desktop_database()
-    
     print_success(f"Updated '{final_name}'")
     print(f"\n{Colors.GRAY}  ┌{'─' * 44}┐{Colors.RESET}")
     print(f"{Colors.GRAY}  │{Colors.RESET}  {Colors.WHITE}Name:{Colors.RESET}  {Colors.CYAN}{final_name}{Colors.RESET}")
@@ -896,6 +3264,547 @@ def cmd_edit(name, new_name=None, new_url=None, new_icon=None):
     print(f"{Colors.GRAY}  │{Colors.RESET}  {Colors.WHITE}Icon:{Colors.RESET}  {Colors.GREEN}{str(final_icon)[:38]}{'...' if len(str(final_icon)) > 38 else ''}{Colors.RESET}")
     print(f"{Colors.GRAY}  └{'─' * 44}┘{Colors.RESET}\n")
 
+BUNDLE_VERSION = 1
+
+def get_browser_display_name(browser):
+    """Map a browser command or path back to its display name."""
+    if not browser:
+        return ''
+    for table in (BROWSERS_LINUX, BROWSERS_MACOS, BROWSERS_WINDOWS):
+        for cmd, flag, app_mode, name in table:
+            if browser in (cmd, name) or expand_windows_path(cmd) == browser:
+                return name
+    return browser
+
+def get_app_icon_files(app):
+    """Get (archive name, path) pairs for the rendered icon files of an app."""
+    files = []
+    if IS_LINUX:
+        icon = app.get('icon', '')
+        if not icon.startswith('webby-'):
+            return files
+        hicolor_base = get_hicolor_base()
+        for size_dir in [f'{size}x{size}' for size in ICON_SIZES] + ['scalable']:
+            for ext in ('.png', '.svg'):
+                icon_file = hicolor_base / size_dir / 'apps' / f'{icon}{ext}'
+                if icon_file.is_file():
+                    files.append((f'icons/hicolor/{size_dir}/apps/{icon}{ext}', icon_file))
+    elif IS_MACOS:
+        resources_dir = app['file'] / 'Contents' / 'Resources'
+        for icon_file in sorted(resources_dir.glob('AppIcon.*')):
+            files.append((f'icons/files/{sanitize_name(app["name"])}{icon_file.suffix}', icon_file))
+    else:
+        icon = app.get('icon', '')
+        if icon and os.path.isfile(icon):
+            files.append((f'icons/files/{Path(icon).name}', Path(icon)))
+    return files
+
+def export_bundle(bundle_path, apps=None):
+    """Write apps and their rendered icons to a .tar.gz bundle. Returns the exported app count."""
+    if apps is None:
+        apps = list(get_webby_apps().values())
+    
+    manifest = {'version': BUNDLE_VERSION, 'platform': PLATFORM, 'apps': []}
+    with tarfile.open(bundle_path, 'w:gz') as tar:
+        for app in apps:
+            icon_files = get_app_icon_files(app)
+            for arcname, icon_file in icon_files:
+                tar.add(str(icon_file), arcname=arcname, recursive=False)
+            manifest['apps'].append({
+                'name': app['name'],
+                'url': app['url'],
+                'icon': app['icon'],
+                'browser': get_browser_display_name(app.get('browser', '')),
+                'icon_files': [arcname for arcname, _ in icon_files],
+            })
+        
+        data = json.dumps(manifest, indent=2).encode()
+        info = tarfile.TarInfo('manifest.json')
+        info.size = len(data)
+        info.mtime = int(time.time())
+        tar.addfile(info, io.BytesIO(data))
+    
+    return len(manifest['apps'])
+
+def _bundle_member_path(arcname, prefix):
+    """Validate an archive member name and return its path relative to prefix."""
+    parts = Path(arcname).parts
+    prefix_parts = Path(prefix).parts
+    if parts[:len(prefix_parts)] != prefix_parts or len(parts) <= len(prefix_parts):
+        raise ValueError(f"Unexpected bundle entry: {arcname}")
+    rel = parts[len(prefix_parts):]
+    if any(part in ('', '.', '..') for part in rel) or os.path.isabs(arcname):
+        raise ValueError(f"Unsafe bundle entry: {arcname}")
+    return Path(*rel)
+
+def _bundle_app_name(entry):
+    """Get a bundle entry's app name, rejecting names that could escape the apps directory."""
+    name = entry.get('name')
+    if not isinstance(name, str) or not name.strip() or '..' in name or any(c in name for c in '/\\\0'):
+        raise ValueError(f"Unsafe app name in bundle: {name!r}")
+    return name
+
+def _bundle_theme_icon_path(arcname, name):
+    """Validate a bundled hicolor icon and return its path relative to the theme.
+    
+    Only the app's own webby-<name> icons may be restored, so a bundle can't
+    replace other icons or theme files.
+    """
+    rel = _bundle_member_path(arcname, 'icons/hicolor')
+    safe = sanitize_name(name)
+    if (len(rel.parts) != 3 or not re.fullmatch(r'(\d+)x\1|scalable', rel.parts[0]) or rel.parts[1] != 'apps'
+            or rel.name not in (f'webby-{safe}.png', f'webby-{safe}.svg')):
+        raise ValueError(f"Unexpected bundle entry: {arcname}")
+    return rel
+
+def _pick_bundle_icon(icon_files):
+    """Pick the largest icon from a bundle entry's icon files."""
+    def score(path):
+        if path.suffix == '.svg':
+            return 10000
+        size = path.parent.parent.name.split('x')[0] if path.parent.name == 'apps' else ''
+        return int(size) if size.isdigit() else 0
+    return max(icon_files, key=score) if icon_files else None
+
+def import_bundle(bundle_path):
+    """Restore apps from an export bundle without network access. Returns the imported names."""
+    available_browsers = detect_all_browsers()
+    if not available_browsers:
+        raise ValueError("No compatible browser found")
+    
+    imported = []
+    with tarfile.open(bundle_path, 'r:*') as tar:
+        manifest = json.load(tar.extractfile('manifest.json'))
+        if manifest.get('version') != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported bundle version: {manifest.get('version')}")
+        native = manifest.get('platform') == PLATFORM
+        
+        # Validate every entry before anything is installed
+        entries = [(_bundle_app_name(entry), entry) for entry in manifest.get('apps', [])]
+        if IS_LINUX and native:
+            for name, entry in entries:
+                for arcname in entry.get('icon_files', []):
+                    _bundle_theme_icon_path(arcname, name)
+        
+        with deferred_refresh():
+            for name, entry in entries:
+                with app_lock(name):
+                    icon = entry.get('icon', '')
+                    icon_files = entry.get('icon_files', [])
+                    
+                    if IS_LINUX and native and icon_files:
+                        hicolor_base = get_hicolor_base()
+                        for arcname in icon_files:
+                            dest = hicolor_base / _bundle_theme_icon_path(arcname, name)
+                            ensure_dir(dest.parent)
+                            temp_path = temp_path_for(dest)
+                            temp_path.write_bytes(tar.extractfile(arcname).read())
+                            commit_icon_file(temp_path, dest)
+                        update_icon_cache({Path(arcname).stem for arcname in icon_files})
+                    elif icon_files:
+                        arcname = str(_pick_bundle_icon([Path(f) for f in icon_files]).as_posix())
+                        dest = get_icons_dir() / f'{sanitize_name(name)}{Path(arcname).suffix}'
+                        dest.write_bytes(tar.extractfile(arcname).read())
+                        if IS_LINUX:
+                            icon = install_icon_to_theme(dest, sanitize_name(name))
+                            dest.unlink(missing_ok=True)
+                        else:
+                            icon = str(dest)
+                    elif not native:
+                        icon = get_default_icon()
+                    
+                    browser = next((b for b in available_browsers if b[3] == entry.get('browser')), available_browsers[0])
+                    create_desktop_file(name, entry['url'], icon, *browser)
+                    update_desktop_database()
+                    imported.append(name)
+    
+    return imported
+
+# Cross-platform artifact generation
+#
+# Backends write launchers for any platform into an output root, so payloads for
+# every OS can be prepared on one (Linux) build host without PowerShell or sips.
+
+class ArtifactApp:
+    def __init__(self, name, url, browser, icons):
+        self.name = name
+        self.url = url
+        self.browser = browser
+        # list of (size, extension, bytes); size is 0 when unknown, 4096 for scalable
+        self.icons = icons
+
+    def png_icons(self):
+        """Get {pixel size: PNG bytes} from PNG icons and PNG frames of .ico icons."""
+        pngs = {}
+        for _, ext, data in self.icons:
+            if data.startswith(PNG_SIGNATURE):
+                candidates = [data]
+            elif ext == '.ico':
+                info = probe_image_stream(io.BytesIO(data))
+                frames = info.frames if info else []
+                candidates = [data[f.offset:f.offset + f.size] for f in frames if f.is_png]
+            else:
+                continue
+            for png in candidates:
+                info = _probe_png(png[:24])
+                if info and info.width == info.height:
+                    pngs.setdefault(info.width, png)
+        return pngs
+
+def _icon_size_from_path(path):
+    size_dir = Path(path).parent.parent.name if Path(path).parent.name == 'apps' else ''
+    if size_dir == 'scalable':
+        return 4096
+    size = size_dir.split('x')[0]
+    return int(size) if size.isdigit() else 0
+
+def collect_installed_artifact_apps():
+    """Get the locally installed apps with their rendered icons."""
+    apps = []
+    for app in get_webby_apps().values():
+        icons = []
+        for arcname, icon_file in get_app_icon_files(app):
+            icons.append((_icon_size_from_path(arcname), icon_file.suffix.lower(), icon_file.read_bytes()))
+        apps.append(ArtifactApp(app['name'], app['url'], get_browser_display_name(app.get('browser', '')), icons))
+    return apps
+
+def collect_bundle_artifact_apps(bundle_path):
+    """Get the apps and icons stored in an export bundle."""
+    apps = []
+    with tarfile.open(bundle_path, 'r:*') as tar:
+        manifest = json.load(tar.extractfile('manifest.json'))
+        if manifest.get('version') != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported bundle version: {manifest.get('version')}")
+        for entry in manifest.get('apps', []):
+            icons = []
+            for arcname in entry.get('icon_files', []):
+                _bundle_member_path(arcname, 'icons')
+                icons.append((_icon_size_from_path(arcname), Path(arcname).suffix.lower(), tar.extractfile(arcname).read()))
+            apps.append(ArtifactApp(_bundle_app_name(entry), entry['url'], entry.get('browser', ''), icons))
+    return apps
+
+def build_ico(pngs):
+    """Build a .ico file from PNG frames (Windows Vista+ reads PNG-compressed frames)."""
+    frames = [(size, data) for size, data in sorted(pngs.items()) if size <= 256]
+    header = struct.pack('<HHH', 0, 1, len(frames))
+    offset = len(header) + 16 * len(frames)
+    directory = b''
+    for size, data in frames:
+        dim = 0 if size == 256 else size
+        directory += struct.pack('<BBBBHHII', dim, dim, 0, 0, 1, 32, len(data), offset)
+        offset += len(data)
+    return header + directory + b''.join(data for _, data in frames)
+
+ICNS_TYPES = {16: b'icp4', 32: b'icp5', 64: b'icp6', 128: b'ic07', 256: b'ic08', 512: b'ic09', 1024: b'ic10'}
+
+def build_icns(pngs):
+    """Build a .icns file from PNG images (macOS 10.7+ reads PNG-compressed entries)."""
+    body = b''
+    for size, data in sorted(pngs.items()):
+        if size in ICNS_TYPES:
+            body += ICNS_TYPES[size] + struct.pack('>I', len(data) + 8) + data
+    return b'icns' + struct.pack('>I', len(body) + 8) + body
+
+# Shell Link (.lnk) constants, see [MS-SHLLINK]
+LNK_CLSID = bytes.fromhex('0114020000000000c000000000000046')
+LNK_HAS_LINK_INFO = 0x2
+LNK_HAS_NAME = 0x4
+LNK_HAS_WORKING_DIR = 0x10
+LNK_HAS_ARGUMENTS = 0x20
+LNK_HAS_ICON_LOCATION = 0x40
+LNK_IS_UNICODE = 0x80
+LNK_HAS_EXP_STRING = 0x200
+LNK_HAS_EXP_ICON = 0x4000
+LNK_ENVIRONMENT_BLOCK = 0xA0000001
+LNK_ICON_ENVIRONMENT_BLOCK = 0xA0000007
+
+def _lnk_string(value):
+    return struct.pack('<H', len(value)) + value.encode('utf-16-le')
+
+def _lnk_environment_block(signature, value):
+    ansi = value.encode('ascii', 'replace')[:259].ljust(260, b'\0')
+    unicode = value.encode('utf-16-le')[:518].ljust(520, b'\0')
+    return struct.pack('<II', 0x314, signature) + ansi + unicode
+
+def build_lnk(target, arguments='', working_dir='', icon_location='', description=''):
+    """Build a Windows Shell Link (.lnk) file without Windows APIs.
+    
+    Targets and icons containing %VARIABLES% are stored in environment data
+    blocks so Windows expands them when the shortcut is used.
+    """
+    flags = LNK_IS_UNICODE
+    link_info = b''
+    extra = b''
+    if '%' in target:
+        flags |= LNK_HAS_EXP_STRING
+        extra += _lnk_environment_block(LNK_ENVIRONMENT_BLOCK, target)
+    else:
+        flags |= LNK_HAS_LINK_INFO
+        volume_id = struct.pack('<IIII', 17, 3, 0, 16) + b'\0'
+        base_path = target.encode('mbcs' if IS_WINDOWS else 'latin-1', 'replace') + b'\0'
+        header_size = 28
+        volume_offset = header_size
+        base_offset = volume_offset + len(volume_id)
+        suffix_offset = base_offset + len(base_path)
+        size = suffix_offset + 1
+        link_info = struct.pack('<IIIIIII', size, header_size, 1, volume_offset, base_offset, 0, suffix_offset)
+        link_info += volume_id + base_path + b'\0'
+    
+    strings = b''
+    if description:
+        flags |= LNK_HAS_NAME
+        strings += _lnk_string(description)
+    if working_dir:
+        flags |= LNK_HAS_WORKING_DIR
+        strings += _lnk_string(working_dir)
+    if arguments:
+        flags |= LNK_HAS_ARGUMENTS
+        strings += _lnk_string(arguments)
+    if icon_location:
+        flags |= LNK_HAS_ICON_LOCATION
+        strings += _lnk_string(icon_location)
+        if '%' in icon_location:
+            flags |= LNK_HAS_EXP_ICON
+            extra += _lnk_environment_block(LNK_ICON_ENVIRONMENT_BLOCK, icon_location)
+    
+    header = struct.pack('<I16sIIQQQIiIHHII', 0x4C, LNK_CLSID, flags, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0)
+    return header + link_info + strings + extra + struct.pack('<I', 0)
+
+class PlatformBackend(ABC):
+    """Writes launchers for one target platform into an output root."""
+    name = None
+    browsers = []
+
+    def pick_browser(self, display_name):
+        """Pick the target's entry for a browser, or its preferred browser."""
+        for browser in self.browsers:
+            if browser[3] == display_name:
+                return browser
+        return self.browsers[0]
+
+    def generate(self, apps, output_root):
+        target_root = Path(output_root) / self.name
+        return [self.write_app(app, target_root) for app in apps]
+
+    @abstractmethod
+    def write_app(self, app, target_root):
+        """Write one app's launcher under target_root; returns the launcher path."""
+
+    @staticmethod
+    def output_path(target_root, *parts):
+        """Join parts onto target_root, refusing paths that resolve outside it."""
+        path = Path(target_root).joinpath(*parts)
+        root = os.path.realpath(target_root)
+        if os.path.commonpath([root, os.path.realpath(path)]) != root:
+            raise ValueError(f"Refusing to write outside {target_root}: {path}")
+        return path
+
+class LinuxBackend(PlatformBackend):
+    """<root>/linux/share/{applications,icons/hicolor}, ready to copy under /usr or ~/.local."""
+    name = 'linux'
+    browsers = BROWSERS_LINUX
+
+    def write_app(self, app, target_root):
+        safe_name = sanitize_name(app.name)
+        icon = 'web-browser'
+        hicolor = target_root / 'share' / 'icons' / 'hicolor'
+        themed = [(size, ext, data) for size, ext, data in app.icons if ext == '.svg' or size]
+        if not themed:
+            themed = [(size, '.png', data) for size, data in app.png_icons().items()]
+        for size, ext, data in themed:
+            if ext == '.svg':
+                size_dir = 'scalable'
+            else:
+                size = max(select_icon_sizes(ImageInfo('png', size, size)))
+                size_dir = f'{size}x{size}'
+            write_file_atomic(self.output_path(hicolor, size_dir, 'apps', f'webby-{safe_name}{ext}'), data)
+            icon = f'webby-{safe_name}'
+        
+        browser, flag, _, _ = self.pick_browser(app.browser)
+        exec_command = linux_exec_command(app.name, app.url, browser, flag, shared=True)
+        desktop_file = self.output_path(target_root, 'share', 'applications', f'webby-{safe_name}.desktop')
+        write_file_atomic(desktop_file, desktop_entry_content(app.name, icon, exec_command).encode())
+        desktop_file.chmod(0o755)
+        return desktop_file
+
+class WindowsBackend(PlatformBackend):
+    """<root>/windows/{Start Menu/Programs/Webby,Webby/icons}, mirroring %APPDATA% and %LOCALAPPDATA%."""
+    name = 'windows'
+    browsers = BROWSERS_WINDOWS
+    ICONS_DIR = r'%LOCALAPPDATA%\Webby\icons'
+
+    def write_app(self, app, target_root):
+        browser, flag, _, browser_name = self.pick_browser(app.browser)
+        browser = browser.replace('{LOCALAPPDATA}', '%LOCALAPPDATA%').replace('{APPDATA}', '%APPDATA%')
+        
+        icon = ''
+        pngs = app.png_icons()
+        if pngs:
+            ico_name = f'{sanitize_name(app.name)}.ico'
+            write_file_atomic(self.output_path(target_root, 'Webby', 'icons', ico_name), build_ico(pngs))
+            icon = f'{self.ICONS_DIR}\\{ico_name}'
+        
+        shortcut_dir = target_root / 'Start Menu' / 'Programs' / 'Webby'
+        shortcut_file = self.output_path(shortcut_dir, f'{app.name}.lnk')
+        working_dir = browser.rsplit('\\', 1)[0]
+        write_file_atomic(shortcut_file, build_lnk(browser, f'{flag}"{app.url}"', working_dir, icon, app.name))
+        write_file_atomic(self.output_path(shortcut_dir, f'{app.name}.webby'), windows_metadata(app.url, icon, browser_name).encode())
+        return shortcut_file
+
+class MacOSBackend(PlatformBackend):
+    """<root>/macos/Webby Apps/<name>.app bundles."""
+    name = 'macos'
+    browsers = BROWSERS_MACOS
+
+    def write_app(self, app, target_root):
+        browser, flag, _, _ = self.pick_browser(app.browser)
+        app_bundle = self.output_path(target_root, 'Webby Apps', f'{app.name}.app')
+        if app_bundle.exists():
+            shutil.rmtree(app_bundle)
+        contents_dir = app_bundle / 'Contents'
+        
+        script_file = self.output_path(contents_dir, 'MacOS', app.name)
+        write_file_atomic(script_file, macos_launcher_script(app.url, browser, flag).encode())
+        script_file.chmod(0o755)
+        write_file_atomic(contents_dir / 'Info.plist', macos_info_plist(app.name).encode())
+        
+        pngs = app.png_icons()
+        if pngs:
+            write_file_atomic(contents_dir / 'Resources' / 'AppIcon.icns', build_icns(pngs))
+        return app_bundle
+
+PLATFORM_BACKENDS = {
+    'linux': LinuxBackend,
+    'windows': WindowsBackend,
+    'macos': MacOSBackend,
+}
+
+def generate_artifacts(targets, output_root, apps):
+    """Write launchers for several platforms in parallel; returns {target: [files]}."""
+    from concurrent.futures import ThreadPoolExecutor
+    unknown = [t for t in targets if t not in PLATFORM_BACKENDS]
+    if unknown:
+        raise ValueError(f"Unknown target(s): {', '.join(unknown)} (choose from {', '.join(PLATFORM_BACKENDS)})")
+    with ThreadPoolExecutor(max_workers=len(targets) or 1) as executor:
+        futures = {t: executor.submit(PLATFORM_BACKENDS[t]().generate, apps, output_root) for t in targets}
+        return {t: future.result() for t, future in futures.items()}
+
+def cmd_icons(query):
+    print_header()
+    if not IS_LINUX:
+        print_error("Theme icons are only supported on Linux")
+        return
+    
+    suggestions = suggest_theme_icons(query, limit=20)
+    if not suggestions:
+        print_info(f"No theme icons match '{query}'")
+        return
+    
+    index = get_icon_theme_index()
+    print_info(f"Theme icons matching '{Colors.CYAN}{query}{Colors.RESET}'")
+    print(f"\n{Colors.GRAY}  ┌{'─' * 50}┐{Colors.RESET}")
+    for name in suggestions:
+        print(f"{Colors.GRAY}  │{Colors.RESET}  {Colors.GREEN}{name:<30}{Colors.RESET} {Colors.DIM}{index[name][1] or 'pixmaps'}{Colors.RESET}")
+    print(f"{Colors.GRAY}  └{'─' * 50}┘{Colors.RESET}\n")
+
+def cmd_doctor(fix=False, as_json=False, deadline=DOCTOR_DEADLINE):
+    if not as_json:
+        print_header()
+    reports = diagnose_apps(deadline=deadline)
+    
+    if fix:
+        with quiet_output():
+            for report in reports:
+                if report['status'] != 'ok':
+                    try:
+                        report['fixed'] = fix_app(report)
+                    except WebbyError as e:
+                        report['fixed'] = {'error': str(e)}
+                    report['status_after_fix'] = recheck_fixed_app(report)
+    
+    summary = {status: sum(1 for r in reports if r['status'] == status) for status in ('ok', 'warning', 'error')}
+    if as_json:
+        print(json.dumps({'summary': summary, 'apps': reports}, indent=2))
+    else:
+        print_info(f"Checked {Colors.CYAN}{len(reports)}{Colors.RESET} web app(s): "
+                   f"{Colors.GREEN}{summary['ok']} ok{Colors.RESET}, "
+                   f"{Colors.YELLOW}{summary['warning']} warning{Colors.RESET}, "
+                   f"{Colors.RED}{summary['error']} error{Colors.RESET}")
+        for status, color, mark in (('error', Colors.RED, '✗'), ('warning', Colors.YELLOW, '⚠')):
+            group = [r for r in reports if r['status'] == status]
+            if not group:
+                continue
+            print(f"\n{Colors.GRAY}  ┌{'─' * 50}┐{Colors.RESET}")
+            for report in group:
+                print(f"{Colors.GRAY}  │{Colors.RESET}  {color}{mark}{Colors.RESET} {Colors.CYAN}{report['name']}{Colors.RESET}")
+                for check_name, check in report['checks'].items():
+                    if not check['ok']:
+                        note = f" {Colors.DIM}(not fixable with --fix){Colors.RESET}" if check.get('fixable') is False else ''
+                        print(f"{Colors.GRAY}  │{Colors.RESET}      {Colors.WHITE}{check_name}:{Colors.RESET} {check['detail']}{note}")
+                if report.get('fixed'):
+                    fixed = ', '.join(f"{key}={value}" for key, value in report['fixed'].items())
+                    print(f"{Colors.GRAY}  │{Colors.RESET}      {Colors.GREEN}fixed:{Colors.RESET} {fixed}")
+            print(f"{Colors.GRAY}  └{'─' * 50}┘{Colors.RESET}")
+        print()
+    
+    # With --fix, only errors that are still there after fixing count
+    remaining = [r.get('status_after_fix', r['status']) for r in reports]
+    if 'error' in remaining:
+        sys.exit(1)
+
+def cmd_watch():
+    print_header()
+    dirs = get_watch_dirs()
+    watcher = open_watcher(dirs)
+    mode = 'inotify' if isinstance(watcher, InotifyWatcher) else f'polling every {WATCH_POLL_INTERVAL}s'
+    print_info(f"Watching {Colors.CYAN}{len(dirs)}{Colors.RESET} directories ({mode}). Press Ctrl+C to stop.")
+    
+    try:
+        while True:
+            for name, old, new in sync_browser_apps():
+                print_success(f"Repointed '{name}' from {old or 'nothing'} to {new}")
+            METRICS.flush()
+            watcher.wait()
+    finally:
+        watcher.close()
+
+def cmd_batch():
+    run_batch(sys.stdin, sys.stdout)
+
+def cmd_generate(targets, output_root, bundle_path=None):
+    print_header()
+    try:
+        apps = collect_bundle_artifact_apps(bundle_path) if bundle_path else collect_installed_artifact_apps()
+        results = generate_artifacts(targets, output_root, apps)
+    except (OSError, tarfile.TarError, ValueError, KeyError) as e:
+        print_error(f"Generation failed: {e}")
+        sys.exit(1)
+    for target, files in results.items():
+        print_success(f"{Colors.CYAN}{target}{Colors.RESET}: {len(files)} app(s) in {Path(output_root) / target}")
+    print()
+
+def cmd_export(bundle_path):
+    print_header()
+    try:
+        count = export_bundle(bundle_path)
+    except (OSError, tarfile.TarError) as e:
+        print_error(f"Export failed: {e}")
+        sys.exit(1)
+    print_success(f"Exported {Colors.CYAN}{count}{Colors.RESET} web app(s) to {bundle_path}")
+
+def cmd_import(bundle_path):
+    print_header()
+    try:
+        with record_operation('import'):
+            imported = import_bundle(bundle_path)
+    except (OSError, tarfile.TarError, ValueError, KeyError) as e:
+        print_error(f"Import failed: {e}")
+        sys.exit(1)
+    print_success(f"Imported {Colors.CYAN}{len(imported)}{Colors.RESET} web app(s)")
+    for name in imported:
+        print(f"  {Colors.GRAY}•{Colors.RESET} {name}")
+    print()
+
 def interactive_mode():
     print_header()
     
@@ -943,6 +3852,9 @@ def interactive_mode():
         print_error("App name is required!")
         sys.exit(1)
     
+    # Icons are installed and old files removed later, under the app's lock
+    replaced_app = None
+    kept_icon = None
     existing_app = find_app_by_name(name)
     if existing_app:
         action = handle_existing_app(existing_app)
@@ -951,7 +3863,10 @@ def interactive_mode():
             print_info("Cancelled")
             sys.exit(0)
         elif action == 'delete':
-            delete_app(existing_app)
+            with app_lock(existing_app['name']):
+                current = reload_app(existing_app['name'])
+                if current:
+                    delete_app(current)
             sys.exit(0)
         elif action == 'edit':
             url = styled_input(f"Website URL [{existing_app['url']}]", Colors.BLUE)
@@ -959,12 +3874,8 @@ def interactive_mode():
             
             print(f"\n{Colors.GRAY}  {Colors.DIM}Icon: theme name, file path, or image URL{Colors.RESET}")
             icon_input = styled_input(f"Icon [{existing_app['icon']}]", Colors.GREEN)
-            icon = find_icon(icon_input, name) if icon_input else existing_app['icon']
-            
-            if IS_MACOS and existing_app['file'].is_dir():
-                shutil.rmtree(existing_app['file'])
-            else:
-                existing_app['file'].unlink(missing_ok=True)
+            kept_icon = existing_app['icon']
+            replaced_app = existing_app
         elif action == 'rename':
             name = styled_input("New App Name", Colors.MAGENTA)
             if not name:
@@ -974,12 +3885,10 @@ def interactive_mode():
             url = styled_input("Website URL", Colors.BLUE)
             print(f"\n{Colors.GRAY}  {Colors.DIM}Icon: theme name, file path, or image URL{Colors.RESET}")
             icon_input = styled_input("Icon (optional)", Colors.GREEN)
-            icon = find_icon(icon_input, name)
     else:
         url = styled_input("Website URL", Colors.BLUE)
         print(f"\n{Colors.GRAY}  {Colors.DIM}Icon: theme name, file path, or image URL{Colors.RESET}")
         icon_input = styled_input("Icon (optional)", Colors.GREEN)
-        icon = find_icon(icon_input, name)
     
     if not url.startswith(('http://', 'https://')):
         url = 'https://' + url
@@ -991,8 +3900,14 @@ def interactive_mode():
     print(f"\n{Colors.GRAY}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Colors.RESET}")
     
     try:
-        desktop_file = create_desktop_file(name, url, icon, browser, browser_flag, has_app_mode, browser_name)
-        update_desktop_database()
+        with app_lock(name), record_operation('create'):
+            icon = kept_icon if kept_icon and not icon_input else find_icon(icon_input, name)
+            if replaced_app:
+                current = reload_app(replaced_app['name'])
+                if current:
+                    _remove_app_files(current)
+            desktop_file = create_desktop_file(name, url, icon, browser, browser_flag, has_app_mode, browser_name)
+            update_desktop_database()
         
         mode_text = f"{Colors.GREEN}App Mode{Colors.RESET}" if has_app_mode else f"{Colors.YELLOW}Browser Window{Colors.RESET}"
         
@@ -1034,6 +3949,16 @@ def main():
   webby --edit youtube --icon /path  Change icon
   webby --edit youtube --name "YT"   Rename app
   webby --delete youtube             Delete web app
+  webby --export apps.tar.gz         Export apps and icons to a bundle
+  webby --import apps.tar.gz         Restore apps from a bundle (offline)
+  sudo webby --system --import a.tgz Provision apps for every user
+  webby --batch < commands.ndjson    Run JSON commands from stdin
+  webby --icons firefox              Search theme icon names
+  webby --doctor [--fix] [--json]    Check (and repair) all web apps
+  webby --watch                      Repoint apps when browsers come and go
+  webby --list --metrics webby.prom  Record operation metrics for node-exporter
+  webby --target windows,macos -o out --import apps.tar.gz
+                                     Generate launchers for other platforms
 """
     )
     
@@ -1043,15 +3968,70 @@ def main():
     parser.add_argument('--name', '-n', metavar='NAME', help='New name (with --edit)')
     parser.add_argument('--url', '-u', metavar='URL', help='New URL (with --edit)')
     parser.add_argument('--icon', '-i', metavar='ICON', help='New icon (with --edit)')
+    parser.add_argument('--export', metavar='FILE', help='Export all web apps with their icons to a bundle')
+    parser.add_argument('--import', dest='import_', metavar='FILE', help='Import web apps from a bundle')
+    parser.add_argument('--icons', metavar='QUERY', help='Search theme icon names (Linux)')
+    parser.add_argument('--doctor', action='store_true', help='Check every web app for broken browsers, icons and URLs')
+    parser.add_argument('--fix', action='store_true', help='Repair problems found by --doctor')
+    parser.add_argument('--json', action='store_true', help='Machine-readable output (with --doctor)')
+    parser.add_argument('--timeout', type=float, default=DOCTOR_DEADLINE, metavar='SECONDS', help=f'Overall deadline for URL checks (default: {DOCTOR_DEADLINE})')
+    parser.add_argument('--batch', action='store_true', help='Read JSON commands from stdin, one per line')
+    parser.add_argument('--watch', action='store_true', help='Keep running and repoint apps when browsers are installed or removed')
+    parser.add_argument('--target', metavar='OS[,OS]', help='Generate launchers for windows, macos and/or linux')
+    parser.add_argument('--output', '-o', metavar='DIR', help='Output root for --target')
+    parser.add_argument('--metrics', metavar='FILE', help='Append Prometheus metrics to a textfile-collector .prom file')
+    parser.add_argument('--system', action='store_true', help='Install for all users instead of the current user')
+    parser.add_argument('--prefix', metavar='DIR', help=f'Prefix for --system on Linux (default: {DEFAULT_SYSTEM_PREFIX})')
     
     args = parser.parse_args()
     
-    if args.list:
+    if args.system:
+        set_system_target(args.prefix)
+        target = get_data_dir()
+        while not target.exists() and target.parent != target:
+            target = target.parent
+        if not os.access(target, os.W_OK):
+            print_error(f"No write access to {target}; run with administrator/root rights for --system")
+            sys.exit(1)
+    elif args.prefix:
+        parser.error('--prefix requires --system')
+    
+    if args.target and not args.output:
+        parser.error('--target requires --output')
+    
+    metrics_file = args.metrics or os.environ.get('WEBBY_METRICS_FILE')
+    if metrics_file:
+        enable_metrics(metrics_file)
+    
+    if args.watch:
+        # Runs until interrupted, refreshing after every change it makes
+        cmd_watch()
+        return
+    
+    # Run every icon cache and desktop database refresh once, at the end
+    with deferred_refresh():
+        run_command(args)
+
+def run_command(args):
+    if args.target:
+        targets = [t.strip().lower() for t in args.target.split(',') if t.strip()]
+        cmd_generate(targets, args.output, args.import_)
+    elif args.list:
         cmd_list()
     elif args.delete:
         cmd_delete(args.delete)
     elif args.edit:
         cmd_edit(args.edit, args.name, args.url, args.icon)
+    elif args.export:
+        cmd_export(args.export)
+    elif args.import_:
+        cmd_import(args.import_)
+    elif args.batch:
+        cmd_batch()
+    elif args.doctor:
+        cmd_doctor(args.fix, args.json, args.timeout)
+    elif args.icons:
+        cmd_icons(args.icons)
     else:
         interactive_mode()
 